@@ -4,50 +4,212 @@ Systology Management Script - Unifying modular components.
 """
 
 import argparse
+import cProfile
 import json
 import sys
+from contextlib import contextmanager
 from pathlib import Path
 
-from scripts.constants import ARCHETYPES_DIR, CONTENT_DIR, SITE_DIR
-from scripts.content import run_add_summary_desc, run_normalize
-from scripts.formatter import run_format_project
-from scripts.insights import generate_insights
-from scripts.metadata import run_sort_tags, run_tag_stats, run_tagup
-from scripts.sync import run_check_sync
-from scripts.validator import run_check
+# Subcommand modules are imported inside their handlers, so each command loads only what it runs
+from scripts.cache import ParseCache
+from scripts.changes import git_changed_files
+from scripts.constants import (
+    ARCHETYPES_DIR,
+    ASSET_BUDGET_KB,
+    CACHE_DIR,
+    CONTENT_DIR,
+    DATA_DIR,
+    DEDUP_THRESHOLD,
+    EXTERNAL_CACHE_FILE,
+    EXTERNAL_CONCURRENCY,
+    EXTERNAL_TIMEOUT,
+    EXTERNAL_TTL_HOURS,
+    INSIGHTS_STATE_FILE,
+    PAGE_BUDGET_KB,
+    PARSE_CACHE_FILE,
+    PER_HOST_CONNECTIONS,
+    REDUNDANCY_THRESHOLD,
+    RELATED_DATA_FILE,
+    RELATED_TAG_WEIGHT,
+    RELATED_TOP_K,
+    SIGNATURE_CACHE_FILE,
+    SIMILARITY_METHODS,
+    SITE_DIR,
+    SYNC_WORKERS,
+)
+from scripts.corpus import load_corpus
+from scripts.profiling import PROFILER
+from scripts.utils import resolve_jobs
 
 
 def main():
     parser = argparse.ArgumentParser(description="Systology Management Script")
+    parser.add_argument("--root", help="Project root containing site/ (defaults to this script's directory)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update the on-disk parse cache")
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="Worker processes for per-file stages (0 = one per CPU, default 1)",
+    )
+    parser.add_argument("--profile", action="store_true", help="Print per-stage time, I/O and peak memory to stderr")
+    parser.add_argument(
+        "--profile-out",
+        metavar="FILE",
+        help="Also write a profile: cProfile stats for .prof/.pstats files, otherwise a Chrome trace (JSON)",
+    )
     subparsers = parser.add_subparsers(dest="command", required=True)
 
+    # Options shared by commands that can be scoped to changed files
+    changes_parser = argparse.ArgumentParser(add_help=False)
+    changes_group = changes_parser.add_mutually_exclusive_group()
+    changes_group.add_argument(
+        "--changed-since",
+        metavar="REV",
+        help="Only process Markdown files changed since REV (working tree and untracked files included)",
+    )
+    changes_group.add_argument("--staged", action="store_true", help="Only process Markdown files staged in the git index")
+
     # Tidy
-    subparsers.add_parser("tidy", help="Run full cleanup pipeline")
+    subparsers.add_parser("tidy", parents=[changes_parser], help="Run full cleanup pipeline")
 
     # Stats
     stats_parser = subparsers.add_parser("stats", help="Tag statistics")
     stats_parser.add_argument("--min-count", type=int, default=1, help="Min count")
     stats_parser.add_argument("--top", type=int, default=0, help="Top N tags")
-    stats_parser.add_argument("--json", action="store_true", help="JSON output")
+    stats_format = stats_parser.add_mutually_exclusive_group()
+    stats_format.add_argument("--json", action="store_true", help="JSON output")
+    stats_format.add_argument("--ndjson", action="store_true", help="One JSON record per tag per line")
     stats_parser.add_argument("--show-files", action="store_true", help="Show files")
 
     # Tagup
     subparsers.add_parser("tagup", help="Standardize tags")
 
     insights_parser = subparsers.add_parser("insights", help="Analyze tag distribution, co-occurrence, and TF-IDF")
-    insights_parser.add_argument(
+    insights_format = insights_parser.add_mutually_exclusive_group()
+    insights_format.add_argument(
         "--json",
         action="store_true",
         help="Emit a JSON manifest instead of human-readable output",
     )
+    insights_format.add_argument(
+        "--ndjson",
+        action="store_true",
+        help="Emit one JSON record per line (stats, redundant tag pair, cross-reference, recommendation) as computed",
+    )
     insights_parser.add_argument(
         "--verbose",
         action="store_true",
         help="Show full cross-reference list in human-readable output",
     )
+    insights_parser.add_argument(
+        "--redundancy-threshold",
+        type=float,
+        default=REDUNDANCY_THRESHOLD,
+        help=f"Minimum Jaccard similarity for a redundant tag pair (default: {REDUNDANCY_THRESHOLD})",
+    )
+    insights_parser.add_argument("--redundancy-top", type=int, default=0, help="Show at most N redundant tag pairs (0 for all)")
+    insights_parser.add_argument(
+        "--redundancy-method",
+        choices=SIMILARITY_METHODS,
+        default="index",
+        help="Exact inverted-index or bitset search, or approximate MinHash/LSH for very large taxonomies",
+    )
+    insights_parser.add_argument("--top-k", type=int, default=0, help="Keep at most K cross-references per document (0 for all)")
+    insights_parser.add_argument("--min-shared", type=int, default=1, help="Minimum shared tags for a cross-reference (default: 1)")
+    insights_parser.add_argument(
+        "--max-memory",
+        type=int,
+        metavar="MB",
+        help="Bounded-memory mode for very large corpora: two streaming passes with document frequencies on disk, reporting only tag recommendations",
+    )
+
+    # Related
+    related_parser = subparsers.add_parser("related", help="Precompute related pages into a Hugo data file")
+    related_parser.add_argument(
+        "--top-k",
+        type=int,
+        default=RELATED_TOP_K,
+        help=f"Related pages kept per document (default: {RELATED_TOP_K})",
+    )
+    related_parser.add_argument(
+        "--tag-weight",
+        type=float,
+        default=RELATED_TAG_WEIGHT,
+        help=f"Share of the score from tag overlap, the rest being TF-IDF cosine (default: {RELATED_TAG_WEIGHT})",
+    )
+    related_parser.add_argument("--output", "-o", help=f"Output file (default: site/{DATA_DIR}/{RELATED_DATA_FILE})")
+
+    # Dedup
+    dedup_parser = subparsers.add_parser("dedup", help="Find near-duplicate documents (MinHash/LSH over body shingles)")
+    dedup_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEDUP_THRESHOLD,
+        help=f"Minimum estimated Jaccard similarity of body shingles (default: {DEDUP_THRESHOLD})",
+    )
+    dedup_parser.add_argument("--json", action="store_true", help="JSON output")
 
     # Check
-    subparsers.add_parser("check", help="Validate content")
+    check_parser = subparsers.add_parser("check", parents=[changes_parser], help="Validate content")
+    check_parser.add_argument(
+        "--asset-budget",
+        type=int,
+        default=ASSET_BUDGET_KB,
+        metavar="KB",
+        help=f"Flag images larger than this (default: {ASSET_BUDGET_KB}, 0 = no limit)",
+    )
+    check_parser.add_argument(
+        "--page-budget",
+        type=int,
+        default=PAGE_BUDGET_KB,
+        metavar="KB",
+        help=f"Flag pages whose distinct local images add up to more than this (default: {PAGE_BUDGET_KB}, 0 = no limit)",
+    )
+    check_parser.add_argument("--weights", action="store_true", help="List the total local image weight of every page")
+    check_parser.add_argument("--external", action="store_true", help="Also probe http(s) links (network access; results are cached)")
+    check_parser.add_argument(
+        "--external-ttl",
+        type=float,
+        default=EXTERNAL_TTL_HOURS,
+        metavar="HOURS",
+        help=f"Re-probe external URLs whose cached result is older than this (default: {EXTERNAL_TTL_HOURS})",
+    )
+    check_parser.add_argument(
+        "--external-concurrency",
+        type=int,
+        default=EXTERNAL_CONCURRENCY,
+        help=f"Maximum external requests in flight (default: {EXTERNAL_CONCURRENCY}, at most {PER_HOST_CONNECTIONS} per host)",
+    )
+    check_parser.add_argument("--external-timeout", type=float, default=EXTERNAL_TIMEOUT, help=f"Seconds per request (default: {EXTERNAL_TIMEOUT:g})")
+
+    # Watch
+    watch_parser = subparsers.add_parser("watch", help="Re-check (and optionally tidy) pages as they are saved")
+    watch_parser.add_argument("--tidy", action="store_true", help="Apply the tidy transforms to each saved page")
+    watch_parser.add_argument("--poll", action="store_true", help="Poll for changes instead of using inotify")
+    watch_parser.add_argument("--interval", type=float, default=0.5, help="Polling interval in seconds (default 0.5)")
+
+    # Bench
+    bench_parser = subparsers.add_parser("bench", help="Benchmark every subcommand on synthetic content trees")
+    bench_parser.add_argument(
+        "--pages",
+        type=int,
+        nargs="+",
+        default=[1000],
+        help="Corpus sizes to generate (default 1000)",
+    )
+    bench_parser.add_argument("--seed", type=int, default=0, help="Random seed for the generated corpus")
+    bench_parser.add_argument("--repeat", type=int, default=1, help="Runs per command; the fastest is reported")
+    bench_parser.add_argument("--output", "-o", help="Write the JSON report to this file")
+    bench_parser.add_argument("--baseline", help="Compare against a previous JSON report")
+    bench_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Fail when a timing is slower than the baseline by more than this ratio (default 0.25)",
+    )
+    bench_parser.add_argument("--keep", action="store_true", help="Keep the generated trees for inspection")
 
     # Check Sync
     check_sync_parser = subparsers.add_parser("check-sync", help="Validate that deep-dive docs are in sync with repos")
@@ -62,11 +224,18 @@ def main():
         action="store_true",
         help="Emit JSON output instead of a formatted table",
     )
+    check_sync_parser.add_argument(
+        "--workers",
+        type=int,
+        default=SYNC_WORKERS,
+        help=f"Maximum git/gh queries running at once (default: {SYNC_WORKERS})",
+    )
 
     args = parser.parse_args()
+    args.jobs = resolve_jobs(args.jobs)
 
     # Path configuration
-    base_dir = Path(__file__).resolve().parent
+    base_dir = Path(args.root).expanduser().resolve() if args.root else Path(__file__).resolve().parent
     site_dir = base_dir / SITE_DIR
     content_dir = site_dir / CONTENT_DIR
     archetypes_dir = site_dir / ARCHETYPES_DIR
@@ -76,38 +245,205 @@ def main():
         "stats": handle_stats,
         "tagup": handle_tagup,
         "insights": handle_insights,
+        "related": handle_related,
+        "dedup": handle_dedup,
         "check": handle_check,
+        "watch": handle_watch,
+        "bench": handle_bench,
         "check-sync": handle_check_sync,
     }
 
-    handlers[args.command](args, base_dir, content_dir, site_dir, archetypes_dir)
+    if not (args.profile or args.profile_out):
+        handlers[args.command](args, base_dir, content_dir, site_dir, archetypes_dir)
+        return
+
+    PROFILER.enable()
+    out = Path(args.profile_out) if args.profile_out else None
+    profile = cProfile.Profile() if out and out.suffix in (".prof", ".pstats") else None
+    try:
+        with PROFILER.stage(f"manage.py {args.command}"):
+            if profile:
+                profile.runcall(handlers[args.command], args, base_dir, content_dir, site_dir, archetypes_dir)
+            else:
+                handlers[args.command](args, base_dir, content_dir, site_dir, archetypes_dir)
+    finally:
+        PROFILER.print_summary()
+        if profile:
+            profile.dump_stats(out)
+            print(f"Wrote cProfile stats to {out}", file=sys.stderr)
+        elif out:
+            PROFILER.write_chrome_trace(out)
+            print(f"Wrote Chrome trace to {out}", file=sys.stderr)
+
+
+@contextmanager
+def parse_cache(args, base_dir):
+    """Yield the persistent parse cache (or None with --no-cache), saving it on success.
+
+    Under --profile, the cache's hit and miss counts are reported on stderr.
+    """
+    if args.no_cache:
+        yield None
+        return
+    cache = ParseCache(base_dir / CACHE_DIR / PARSE_CACHE_FILE)
+    yield cache
+    cache.save()
+    if PROFILER.enabled:
+        print(f"Parse cache: {cache.hits} hits, {cache.misses} misses", file=sys.stderr)
+
+
+def resolve_changed(args, base_dir) -> set[Path] | None:
+    """Return the changed Markdown files requested via --changed-since/--staged, or None for all files."""
+    if not args.changed_since and not args.staged:
+        return None
+    changed = git_changed_files(base_dir, since=args.changed_since, staged=args.staged)
+    if changed is None:
+        print(f"Error: Could not list changed files from git ({'staged' if args.staged else args.changed_since}).")
+        sys.exit(1)
+    print(f"Scoped to {len(changed)} changed Markdown files")
+    return changed
 
 
 def handle_tidy(args, base_dir, content_dir, site_dir, archetypes_dir):
-    run_normalize(content_dir)
-    run_add_summary_desc(content_dir)
-    run_tagup(content_dir)
-    run_sort_tags(content_dir)
-    run_format_project(site_dir, content_dir, archetypes_dir)
+    from scripts.formatter import run_format_project
+    from scripts.tidy import ARCHETYPE_STEPS, CONTENT_STEPS, run_tidy
+
+    changed = resolve_changed(args, base_dir)
+    run_tidy(load_corpus(content_dir, only=changed), CONTENT_STEPS, args.jobs)
+    run_tidy(load_corpus(archetypes_dir, only=changed), ARCHETYPE_STEPS, args.jobs)
+    run_format_project(site_dir)
 
 
 def handle_stats(args, base_dir, content_dir, site_dir, archetypes_dir):
-    run_tag_stats(content_dir, args.min_count, args.top, args.json, args.show_files)
+    from scripts.metadata import run_tag_stats
+
+    with parse_cache(args, base_dir) as cache:
+        run_tag_stats(load_corpus(content_dir, cache, header_only=True), args.min_count, args.top, args.json, args.show_files, args.ndjson)
 
 
 def handle_tagup(args, base_dir, content_dir, site_dir, archetypes_dir):
-    run_tagup(content_dir)
+    from scripts.metadata import run_tagup
+
+    run_tagup(load_corpus(content_dir, header_only=True))
 
 
 def handle_insights(args, base_dir, content_dir, site_dir, archetypes_dir):
-    generate_insights(content_dir, json_out=args.json, verbose=args.verbose)
+    if not 0 < args.redundancy_threshold <= 1:
+        print("Error: --redundancy-threshold must be greater than 0 and at most 1.")
+        sys.exit(1)
+    if args.max_memory is not None:
+        if args.max_memory <= 0:
+            print("Error: --max-memory must be a positive number of megabytes.")
+            sys.exit(1)
+        from scripts.insights_bounded import generate_bounded_insights
+
+        # Streams the files itself; the parse cache and incremental state would hold the whole corpus
+        generate_bounded_insights(content_dir, base_dir / CACHE_DIR, args.max_memory, json_out=args.json, ndjson=args.ndjson)
+        return
+    from scripts.insights import generate_insights
+    from scripts.insights_state import InsightsState
+
+    # Incremental state lives next to the parse cache and is bypassed along with it
+    state = None if args.no_cache else InsightsState(base_dir / CACHE_DIR / INSIGHTS_STATE_FILE)
+    with parse_cache(args, base_dir) as cache:
+        generate_insights(
+            load_corpus(content_dir, cache, header_only=True),
+            json_out=args.json,
+            verbose=args.verbose,
+            jobs=args.jobs,
+            redundancy_threshold=args.redundancy_threshold,
+            redundancy_top=args.redundancy_top,
+            redundancy_method=args.redundancy_method,
+            top_k=args.top_k,
+            min_shared=args.min_shared,
+            ndjson=args.ndjson,
+            state=state,
+        )
+    if state is not None:
+        state.save()
+
+
+def handle_related(args, base_dir, content_dir, site_dir, archetypes_dir):
+    from scripts.related import run_related
+
+    if not 0 <= args.tag_weight <= 1:
+        print("Error: --tag-weight must be between 0 and 1.")
+        sys.exit(1)
+    output = Path(args.output) if args.output else site_dir / DATA_DIR / RELATED_DATA_FILE
+    with parse_cache(args, base_dir) as cache:
+        run_related(load_corpus(content_dir, cache, header_only=True), output, args.top_k, args.tag_weight, args.jobs)
+
+
+def handle_dedup(args, base_dir, content_dir, site_dir, archetypes_dir):
+    from scripts.dedup import SignatureCache, run_dedup
+
+    if not 0 < args.threshold <= 1:
+        print("Error: --threshold must be greater than 0 and at most 1.")
+        sys.exit(1)
+    signatures = None if args.no_cache else SignatureCache(base_dir / CACHE_DIR / SIGNATURE_CACHE_FILE)
+    with parse_cache(args, base_dir) as cache:
+        run_dedup(load_corpus(content_dir, cache, header_only=True), args.threshold, args.json, signatures, args.jobs)
+    if signatures is not None:
+        signatures.save()
 
 
 def handle_check(args, base_dir, content_dir, site_dir, archetypes_dir):
-    run_check(content_dir)
+    from scripts.assets import AssetBudget
+    from scripts.validator import run_check
+
+    if args.external_ttl < 0 or args.external_concurrency < 1 or args.external_timeout <= 0:
+        print("Error: --external-ttl must be >= 0, --external-concurrency >= 1 and --external-timeout > 0.")
+        sys.exit(1)
+    if args.asset_budget < 0 or args.page_budget < 0:
+        print("Error: --asset-budget and --page-budget must be >= 0.")
+        sys.exit(1)
+    external = None
+    if args.external:
+        from scripts.external import ExternalCache, ExternalChecker
+
+        results = None if args.no_cache else ExternalCache(base_dir / CACHE_DIR / EXTERNAL_CACHE_FILE, args.external_ttl * 3600)
+        external = ExternalChecker(results, args.external_concurrency, timeout=args.external_timeout)
+    changed = resolve_changed(args, base_dir)
+    with parse_cache(args, base_dir) as cache:
+        # Links resolve against the whole corpus even when only changed files are checked
+        run_check(
+            load_corpus(content_dir, cache, header_only=changed is not None),
+            args.jobs,
+            only=changed,
+            external=external,
+            budget=AssetBudget(args.asset_budget, args.page_budget),
+            weights=args.weights,
+        )
+
+
+def handle_watch(args, base_dir, content_dir, site_dir, archetypes_dir):
+    from scripts.watch import run_watch
+
+    run_watch(content_dir, tidy=args.tidy, force_poll=args.poll, interval=args.interval)
+
+
+def handle_bench(args, base_dir, content_dir, site_dir, archetypes_dir):
+    from scripts.bench import run_bench
+
+    run_bench(
+        Path(__file__).resolve().parent,
+        archetypes_dir,
+        args.pages,
+        seed=args.seed,
+        repeat=args.repeat,
+        output=Path(args.output) if args.output else None,
+        baseline=Path(args.baseline) if args.baseline else None,
+        threshold=args.threshold,
+        keep=args.keep,
+    )
 
 
 def handle_check_sync(args, base_dir, content_dir, site_dir, archetypes_dir):
+    from scripts.sync import run_check_sync
+
+    if args.workers < 1:
+        print("Error: --workers must be >= 1.")
+        sys.exit(1)
     search_paths = []
 
     if args.search_path:
@@ -132,7 +468,7 @@ def handle_check_sync(args, base_dir, content_dir, site_dir, archetypes_dir):
         print('{\n   "search_paths": [\n     "~/Playground",\n     "~/JetBrains"\n   ]\n}')
         sys.exit(1)
 
-    run_check_sync(content_dir, search_paths, args.json)
+    run_check_sync(content_dir, search_paths, args.json, args.workers)
 
 
 if __name__ == "__main__":
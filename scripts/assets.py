@@ -0,0 +1,163 @@
+"""
+Image dimensions from file headers, and byte budgets for images and the pages that embed them.
+"""
+
+import re
+import struct
+from pathlib import Path
+from typing import BinaryIO
+
+from .constants import ASSET_BUDGET_KB, PAGE_BUDGET_KB
+
+# Enough for every fixed-offset header and for the opening <svg> tag of any sane SVG
+HEADER_BYTES = 4096
+SVG_HEAD_BYTES = 64 * 1024
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# JPEG start-of-frame markers (C4, C8 and CC are other segments) and markers without a length
+JPEG_SOF = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+JPEG_STANDALONE = frozenset([0x01, *range(0xD0, 0xD9)])
+
+SVG_TAG_RE = re.compile(rb"<svg\b[^>]*>", re.IGNORECASE)
+SVG_ATTR_RE = re.compile(rb"""\b(viewBox|width|height)\s*=\s*["']([^"']*)["']""", re.IGNORECASE)
+SVG_LENGTH_RE = re.compile(rb"\s*([0-9.]+)\s*(px)?\s*$")
+
+
+class ImageInfo:
+    """An image's format, pixel dimensions (None when the header does not say) and size in bytes."""
+
+    __slots__ = ("format", "height", "size", "width")
+
+    def __init__(self, fmt: str | None, width: int | None, height: int | None, size: int):
+        self.format = fmt
+        self.width = width
+        self.height = height
+        self.size = size
+
+    def describe(self) -> str:
+        dims = f" ({self.width}x{self.height})" if self.width and self.height else ""
+        return f"{format_size(self.size)}{dims}"
+
+
+def format_size(n: int) -> str:
+    if n < 1024:
+        return f"{n} B"
+    if n < 1024 * 1024:
+        return f"{n / 1024:.0f} KB"
+    return f"{n / (1024 * 1024):.1f} MB"
+
+
+def jpeg_dimensions(f: BinaryIO) -> tuple[int, int] | None:
+    """Walk JPEG segment headers, seeking past their payloads, up to the first start-of-frame."""
+    pos = 2
+    while True:
+        f.seek(pos)
+        head = f.read(9)
+        if len(head) < 2 or head[0] != 0xFF:
+            return None
+        marker = head[1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            pos += 1
+            continue
+        if marker in JPEG_STANDALONE:
+            pos += 2
+            continue
+        if marker in (0xD9, 0xDA) or len(head) < 4:
+            # End of image, or entropy-coded data begins: no frame header found
+            return None
+        if marker in JPEG_SOF:
+            if len(head) < 9:
+                return None
+            height, width = struct.unpack(">HH", head[5:9])
+            return width, height
+        pos += 2 + struct.unpack(">H", head[2:4])[0]
+
+
+def svg_dimensions(head: bytes) -> tuple[int, int] | None:
+    """Read dimensions from the root <svg> tag: the viewBox, else plain numeric width and height."""
+    tag = SVG_TAG_RE.search(head)
+    if tag is None:
+        return None
+    attrs = {name.lower(): value for name, value in SVG_ATTR_RE.findall(tag.group())}
+    box = attrs.get(b"viewbox", b"").replace(b",", b" ").split()
+    try:
+        if len(box) == 4:
+            return round(float(box[2])), round(float(box[3]))
+        width, height = SVG_LENGTH_RE.match(attrs.get(b"width", b"")), SVG_LENGTH_RE.match(attrs.get(b"height", b""))
+        if width and height:
+            return round(float(width.group(1))), round(float(height.group(1)))
+    except ValueError:
+        pass
+    return None
+
+
+def read_image_info(path: Path) -> ImageInfo:
+    """Identify an image and its dimensions from its header alone; never decodes pixel data."""
+    with path.open("rb") as f:
+        size = f.seek(0, 2)
+        f.seek(0)
+        head = f.read(HEADER_BYTES)
+        dims = None
+        fmt = None
+        if head.startswith(PNG_SIGNATURE) and head[12:16] == b"IHDR" and len(head) >= 24:
+            fmt, dims = "png", struct.unpack(">II", head[16:24])
+        elif head[:6] in (b"GIF87a", b"GIF89a") and len(head) >= 10:
+            fmt, dims = "gif", struct.unpack("<HH", head[6:10])
+        elif head[:4] == b"RIFF" and head[8:12] == b"WEBP" and len(head) >= 30:
+            fmt, chunk = "webp", head[12:16]
+            if chunk == b"VP8 ":
+                dims = (struct.unpack("<H", head[26:28])[0] & 0x3FFF, struct.unpack("<H", head[28:30])[0] & 0x3FFF)
+            elif chunk == b"VP8L":
+                bits = int.from_bytes(head[21:25], "little")
+                dims = ((bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+            elif chunk == b"VP8X":
+                dims = (int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1)
+        elif head[:2] == b"\xff\xd8":
+            fmt, dims = "jpeg", jpeg_dimensions(f)
+        elif path.suffix.lower() == ".svg" or b"<svg" in head:
+            f.seek(0)
+            fmt, dims = "svg", svg_dimensions(f.read(SVG_HEAD_BYTES))
+    width, height = dims if dims else (None, None)
+    return ImageInfo(fmt, width, height, size)
+
+
+class AssetBudget:
+    """Byte limits for single images and for the distinct local images of a page (0 disables either).
+
+    Image headers are read once per file and remembered for the rest of the run.
+    """
+
+    __slots__ = ("asset_bytes", "infos", "page_bytes")
+
+    def __init__(self, asset_kb: int = ASSET_BUDGET_KB, page_kb: int = PAGE_BUDGET_KB):
+        self.asset_bytes = asset_kb * 1024
+        self.page_bytes = page_kb * 1024
+        self.infos: dict[Path, ImageInfo | None] = {}
+
+    def info(self, path: Path) -> ImageInfo | None:
+        if path not in self.infos:
+            try:
+                self.infos[path] = read_image_info(path)
+            except OSError:
+                self.infos[path] = None
+        return self.infos[path]
+
+    def page_weight(self, images: list[tuple[str, int, int, Path]]) -> tuple[int, int]:
+        """Return the total bytes and number of the distinct readable images in images."""
+        infos = [info for info in map(self.info, {path for *_, path in images}) if info is not None]
+        return sum(info.size for info in infos), len(infos)
+
+    def check(self, images: list[tuple[str, int, int, Path]]) -> list[str]:
+        """Return errors for images over the per-asset budget and for a page over the per-page budget."""
+        errors = []
+        if self.asset_bytes:
+            for src, line, col, path in images:
+                info = self.info(path)
+                if info is not None and info.size > self.asset_bytes:
+                    errors.append(f"Image over budget: {src} is {info.describe()}, budget {format_size(self.asset_bytes)} (line {line}, col {col})")
+        if self.page_bytes:
+            total, count = self.page_weight(images)
+            if total > self.page_bytes:
+                errors.append(f"Page weight over budget: {format_size(total)} in {count} images, budget {format_size(self.page_bytes)}")
+        return errors
@@ -0,0 +1,312 @@
+"""
+Synthetic corpus generation and benchmarking for the Systology management commands.
+"""
+
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from .constants import ARCHETYPES_DIR, CONTENT_DIR, MD_EXT, SITE_DIR, STATIC_DIR, TAG_ALIASES
+from .corpus import load_corpus
+from .dedup import collect_signatures, find_duplicates
+from .insights import (
+    collect_cross_references,
+    collect_docs,
+    collect_tag_cooccurrence,
+    collect_tag_distribution,
+    collect_tag_recommendations,
+)
+from .linkindex import LinkIndex
+from .metadata import run_tag_stats
+from .related import build_related
+from .tidy import CONTENT_STEPS, tidy_text
+from .validator import check_file
+
+# Archetype file to the content section it is generated into
+ARCHETYPE_SECTIONS = {
+    "designs.md": "designs",
+    "principles.md": "principles",
+    "deep-dives.md": "deep-dives",
+    "deep-dives-comparative.md": "deep-dives",
+}
+
+SYLLABLES = ["ar", "ba", "cache", "da", "el", "flow", "gra", "hash", "in", "jo", "ka", "log", "mer", "net", "or", "pa", "que", "ro", "shard", "ti"]
+
+# Share of generated links that point at pages which do not exist
+BROKEN_LINK_RATE = 0.01
+
+BENCH_REPOS = 8
+
+# A tiny valid 1x1 PNG used for generated image references
+PNG_1X1 = bytes.fromhex("89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082")
+
+
+def zipf_weights(n: int, s: float = 1.1) -> list[float]:
+    """Return Zipf-like weights so a few items dominate and the rest form a long tail."""
+    return [1 / (rank**s) for rank in range(1, n + 1)]
+
+
+def make_vocabulary(rng: random.Random, size: int) -> list[str]:
+    """Build a pseudo-word vocabulary of at least four characters per word."""
+    words: set[str] = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(w for w in words if len(w) >= 4)
+
+
+def make_tag_pool(n_synthetic: int) -> list[str]:
+    """Canonical tags, their aliases (so tagup has work to do) and synthetic topics."""
+    canonical = sorted(set(TAG_ALIASES.values()))
+    return canonical + sorted(TAG_ALIASES) + [f"topic-{i}" for i in range(n_synthetic)]
+
+
+def generate_corpus(dest: Path, archetypes_dir: Path, pages: int, seed: int = 0) -> Path:
+    """Generate a synthetic Hugo project under dest and return its content directory.
+
+    Pages are rendered from the archetype templates with Zipf-distributed tags and
+    vocabulary, internal links (a small share broken), static images and references
+    to local git repositories so every subcommand has realistic work.
+    """
+    rng = random.Random(seed)
+    site_dir = dest / SITE_DIR
+    content_dir = site_dir / CONTENT_DIR
+    shutil.copytree(archetypes_dir, site_dir / ARCHETYPES_DIR, dirs_exist_ok=True)
+
+    templates = {name: (archetypes_dir / name).read_text(encoding="utf-8") for name in ARCHETYPE_SECTIONS if (archetypes_dir / name).is_file()}
+    names = sorted(templates)
+    vocab = make_vocabulary(rng, 4000)
+    vocab_weights = zipf_weights(len(vocab))
+    tag_pool = make_tag_pool(max(20, pages // 50))
+    tag_weights = zipf_weights(len(tag_pool), s=0.9)
+
+    images_dir = site_dir / STATIC_DIR / "images"
+    images_dir.mkdir(parents=True, exist_ok=True)
+    n_images = max(1, pages // 100)
+    for i in range(n_images):
+        (images_dir / f"bench-{i}.png").write_bytes(PNG_1X1)
+
+    repos = [f"huangsam/bench-repo-{i}" for i in range(BENCH_REPOS)]
+    plan = [(i, names[i % len(names)]) for i in range(pages)]
+    slugs = [f"{ARCHETYPE_SECTIONS[name]}/page-{i}" for i, name in plan]
+    base_date = datetime(2026, 1, 1, tzinfo=UTC)
+
+    for (i, name), slug in zip(plan, slugs):
+        section = ARCHETYPE_SECTIONS[name]
+        title = " ".join(rng.choices(vocab, weights=vocab_weights, k=4)).title()
+        n_tags = rng.choices([0, 1, 3, 4, 5, 7], weights=[2, 5, 30, 35, 25, 3])[0]
+        tags = sorted(set(rng.choices(tag_pool, weights=tag_weights, k=n_tags)))
+        text = templates[name]
+        text = text.replace('"Short title"', f'"{title}"', 1)
+        text = text.replace("tags: []", f"tags: [{', '.join(tags)}]", 1)
+        text = text.replace("{{ .Date }}", (base_date + timedelta(hours=i)).isoformat(), 1)
+        if rng.random() < 0.3:
+            # Leave some pages without summary/description so tidy backfills them
+            text = "\n".join(ln for ln in text.splitlines() if not ln.startswith(("summary:", "description:"))) + "\n"
+
+        paragraphs = []
+        for _ in range(rng.randint(3, 12)):
+            words = rng.choices(vocab, weights=vocab_weights, k=rng.randint(40, 120))
+            for _ in range(rng.randint(0, 3)):
+                pos = rng.randrange(len(words))
+                if rng.random() < BROKEN_LINK_RATE:
+                    words[pos] = f"[{words[pos]}](/{section}/missing-{i})"
+                else:
+                    words[pos] = f"[{words[pos]}](/{rng.choice(slugs)})"
+            if rng.random() < 0.2:
+                words.append(f"\n\n![diagram](/images/bench-{rng.randrange(n_images)}.png)")
+            paragraphs.append(" ".join(words) + ("   " if rng.random() < 0.1 else ""))
+        if section == "deep-dives":
+            paragraphs.append(f"Source: https://github.com/{rng.choice(repos)}")
+
+        page = content_dir / f"{slug}{MD_EXT}"
+        page.parent.mkdir(parents=True, exist_ok=True)
+        page.write_text(text + "\n" + "\n\n".join(paragraphs) + "\n", encoding="utf-8")
+
+    make_bench_repos(dest / "repos", repos)
+    return content_dir
+
+
+def make_bench_repos(repos_dir: Path, repos: list[str]) -> None:
+    """Create tiny local git repositories so check-sync never needs the network."""
+    env = {
+        "GIT_AUTHOR_NAME": "bench",
+        "GIT_AUTHOR_EMAIL": "bench@example.com",
+        "GIT_COMMITTER_NAME": "bench",
+        "GIT_COMMITTER_EMAIL": "bench@example.com",
+        "PATH": os.environ.get("PATH", ""),
+    }
+    for repo in repos:
+        path = repos_dir / repo.split("/")[-1]
+        path.mkdir(parents=True, exist_ok=True)
+        (path / "README.md").write_text(f"# {repo}\n", encoding="utf-8")
+        try:
+            subprocess.run(["git", "init", "-q"], cwd=path, check=True, capture_output=True)
+            subprocess.run(["git", "add", "."], cwd=path, check=True, capture_output=True)
+            subprocess.run(["git", "commit", "-q", "-m", "init"], cwd=path, check=True, capture_output=True, env=env)
+        except (subprocess.SubprocessError, OSError):
+            return
+
+
+def time_command(manage_py: Path, root: Path, argv: list[str]) -> float:
+    """Run one manage.py invocation against root and return its wall time in seconds."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, str(manage_py), "--root", str(root), *argv], cwd=root, check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def time_commands(manage_py: Path, root: Path, repeat: int) -> dict[str, dict[str, float]]:
+    """Time each subcommand end to end, cold (no cache) and warm (cache populated)."""
+    repos_dir = root / "repos"
+    commands = {
+        "stats": ["stats"],
+        "insights": ["insights", "--json"],
+        "related": ["related"],
+        "dedup": ["dedup", "--json"],
+        "check": ["check"],
+        "check-sync": ["check-sync", "--json", "-p", str(repos_dir)],
+    }
+    results: dict[str, dict[str, float]] = {}
+    for name, argv in commands.items():
+        cold = min(time_command(manage_py, root, ["--no-cache", *argv]) for _ in range(repeat))
+        time_command(manage_py, root, argv)  # populate the parse cache
+        warm = min(time_command(manage_py, root, argv) for _ in range(repeat))
+        results[name] = {"cold": cold, "warm": warm}
+    # tidy rewrites files, so it runs last: once with real work and once as a no-op
+    results["tidy"] = {
+        "cold": time_command(manage_py, root, ["--no-cache", "tidy"]),
+        "warm": min(time_command(manage_py, root, ["tidy"]) for _ in range(repeat)),
+    }
+    return results
+
+
+def time_stages(content_dir: Path) -> dict[str, float]:
+    """Time the individual in-process stages behind the subcommands."""
+    timings: dict[str, float] = {}
+
+    def timed(name, fn, *args):
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            result = fn(*args)
+        timings[name] = time.perf_counter() - start
+        return result
+
+    corpus = timed("load_corpus", load_corpus, content_dir)
+    timed("tag_stats", run_tag_stats, corpus, 1, 0, True, False)
+    timed("tidy_transforms", lambda: [tidy_text(doc.text, CONTENT_STEPS) for doc in corpus])
+    index = timed("link_index", LinkIndex.build, corpus, content_dir.parent / STATIC_DIR)
+    timed("check_file", lambda: [check_file(doc, index) for doc in corpus])
+    docs, global_tags = timed("collect_docs", collect_docs, corpus)
+    timed("tag_distribution", collect_tag_distribution, docs)
+    timed("tag_cooccurrence", collect_tag_cooccurrence, docs)
+    timed("cross_references", collect_cross_references, docs)
+    timed("tag_recommendations", collect_tag_recommendations, docs, global_tags)
+    timed("related", build_related, docs)
+    timed("dedup", lambda: find_duplicates(collect_signatures(corpus)))
+    return timings
+
+
+def git_revision(repo_dir: Path) -> str | None:
+    """Return the short HEAD revision of repo_dir, if it is a git checkout."""
+    try:
+        res = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=repo_dir, capture_output=True, text=True, check=True)
+        return res.stdout.strip()
+    except (subprocess.SubprocessError, OSError):
+        return None
+
+
+def compare_reports(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Return a description of every timing that regressed by more than threshold (a ratio)."""
+    regressions = []
+    for size, entry in current["runs"].items():
+        base_entry = baseline.get("runs", {}).get(size)
+        if not base_entry:
+            continue
+        for group in ("commands", "stages"):
+            for name, value in entry[group].items():
+                base_value = base_entry.get(group, {}).get(name)
+                pairs = value.items() if isinstance(value, dict) else [("", value)]
+                for mode, secs in pairs:
+                    old = base_value.get(mode) if isinstance(base_value, dict) else base_value
+                    if old and secs > old * (1 + threshold):
+                        label = f"{name}.{mode}" if mode else name
+                        regressions.append(f"{size} pages {group}/{label}: {old:.3f}s -> {secs:.3f}s (+{(secs / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def print_report(report: dict) -> None:
+    """Print command and stage timings for every corpus size in a report."""
+    for size, entry in report["runs"].items():
+        print(f"\n{size} pages:")
+        print(f"  {'command':<20} {'cold':>9} {'warm':>9}")
+        for name, t in entry["commands"].items():
+            print(f"  {name:<20} {t['cold']:>8.3f}s {t['warm']:>8.3f}s")
+        print(f"  {'stage':<20} {'time':>9}")
+        for name, secs in entry["stages"].items():
+            print(f"  {name:<20} {secs:>8.3f}s")
+
+
+def run_bench(
+    base_dir: Path,
+    archetypes_dir: Path,
+    sizes: list[int],
+    seed: int = 0,
+    repeat: int = 1,
+    output: Path | None = None,
+    baseline: Path | None = None,
+    threshold: float = 0.25,
+    keep: bool = False,
+) -> None:
+    """Generate synthetic corpora, time every subcommand and stage, and report the results."""
+    report = {
+        "meta": {
+            "revision": git_revision(base_dir),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(UTC).isoformat(),
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "runs": {},
+    }
+    for pages in sizes:
+        root = Path(tempfile.mkdtemp(prefix=f"systology-bench-{pages}-"))
+        try:
+            print(f"Generating {pages} pages in {root}...")
+            content_dir = generate_corpus(root, archetypes_dir, pages, seed)
+            stages = time_stages(content_dir)
+            commands = time_commands(base_dir / "manage.py", root, repeat)
+            report["runs"][str(pages)] = {"commands": commands, "stages": stages}
+        finally:
+            if keep:
+                print(f"  Kept {root}")
+            else:
+                shutil.rmtree(root, ignore_errors=True)
+
+    print_report(report)
+    if output:
+        output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"\nWrote {output}")
+
+    if baseline:
+        try:
+            base_report = json.loads(baseline.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error: Failed to read baseline {baseline}: {e}")
+            sys.exit(1)
+        regressions = compare_reports(report, base_report, threshold)
+        if regressions:
+            print(f"\nRegressions over {threshold * 100:.0f}% vs {baseline}:")
+            for r in regressions:
+                print(f"  - {r}")
+            sys.exit(1)
+        print(f"\nNo regressions over {threshold * 100:.0f}% vs {baseline}")
@@ -0,0 +1,123 @@
+"""
+Persistent on-disk cache of per-file parse results for Systology content.
+"""
+
+import hashlib
+import marshal
+import time
+from pathlib import Path
+
+from .corpus import Document
+from .frontmatter import read_header
+from .profiling import PROFILER, profiled
+from .utils import decode_text, write_atomic
+
+# Bump whenever the shape of Document.parsed() or any memoized value changes
+CACHE_VERSION = 5
+
+# Upper bound on the serialized size of all entries before least-recently-used eviction
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def load_marshal(path: Path, version: int) -> dict | None:
+    """Return the marshalled dict stored at path, or None if it is missing, unreadable or from another version."""
+    try:
+        raw = path.read_bytes()
+        PROFILER.record_read(len(raw))
+        data = marshal.loads(raw)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    return data if isinstance(data, dict) and data.get("version") == version else None
+
+
+def save_marshal(path: Path, data: dict) -> None:
+    """Atomically write data (which carries its own "version") to path, creating its directory."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(path, marshal.dumps(data))
+
+
+def content_digest(raw: bytes) -> bytes:
+    """Return a short, stable digest of a file's raw bytes."""
+    return hashlib.blake2b(raw, digest_size=16).digest()
+
+
+class ParseCache:
+    """Parse results keyed by path and validated by mtime, size and content hash.
+
+    Entries are stored as ``[mtime_ns, size, digest, last_used, blob]`` where blob is
+    the marshalled output of Document.parsed(). A matching mtime and size is trusted
+    without reading the file; otherwise the content hash decides whether the parse
+    can be reused (e.g. after a checkout that only touched timestamps).
+    """
+
+    def __init__(self, path: Path, max_bytes: int = CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.entries: dict[str, list] = {}
+        self.live: dict[str, tuple[int, int, bytes, Document]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    @profiled("cache_load")
+    def _load(self) -> None:
+        data = load_marshal(self.path, CACHE_VERSION)
+        if data is not None:
+            self.entries = data["entries"]
+
+    def open(self, p: Path, header_only: bool = False) -> Document:
+        """Return a Document for p, reusing the cached parse when the file is unchanged.
+
+        With ``header_only``, a file with no cache entry is read only up to the end
+        of its frontmatter; its digest is filled in at save time if the body was
+        loaded, and otherwise left empty so the next mismatch forces a re-parse.
+        """
+        key = str(p)
+        st = p.stat()
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            digest = entry[2]
+            doc = Document.from_parsed(p, marshal.loads(entry[4]))
+            self.hits += 1
+        elif entry is None and header_only:
+            digest = b""
+            doc = Document.from_header(p, read_header(p))
+            self.misses += 1
+        else:
+            raw = p.read_bytes()
+            PROFILER.record_read(len(raw))
+            digest = content_digest(raw)
+            text = decode_text(raw)
+            if entry is not None and entry[2] == digest:
+                doc = Document.from_parsed(p, marshal.loads(entry[4]), text)
+                self.hits += 1
+            else:
+                doc = Document(p, text)
+                self.misses += 1
+        self.live[key] = (st.st_mtime_ns, st.st_size, digest, doc)
+        return doc
+
+    @profiled("cache_save")
+    def save(self) -> None:
+        """Fold this run's documents into the cache, evict old entries and persist it."""
+        now = time.time()
+        for key, (mtime_ns, size, digest, doc) in self.live.items():
+            if doc.loaded:
+                # The document may have been rewritten during the run; re-stamp it from disk
+                try:
+                    st = doc.path.stat()
+                except OSError:
+                    self.entries.pop(key, None)
+                    continue
+                if (st.st_mtime_ns, st.st_size) != (mtime_ns, size) or not digest:
+                    mtime_ns, size, digest = st.st_mtime_ns, st.st_size, content_digest(doc.text.encode("utf-8"))
+            self.entries[key] = [mtime_ns, size, digest, now, marshal.dumps(doc.parsed())]
+
+        total = sum(len(e[4]) for e in self.entries.values())
+        if total > self.max_bytes:
+            for key in sorted(self.entries, key=lambda k: self.entries[k][3]):
+                total -= len(self.entries.pop(key)[4])
+                if total <= self.max_bytes:
+                    break
+
+        save_marshal(self.path, {"version": CACHE_VERSION, "entries": self.entries})
@@ -0,0 +1,37 @@
+"""
+Logic for scoping runs to the Markdown files that changed in git.
+"""
+
+import subprocess
+from pathlib import Path
+
+from .constants import MD_EXT
+
+
+def _git_lines(args: list[str], cwd: Path) -> list[str] | None:
+    """Run a git command and return its NUL-separated output entries, or None on failure."""
+    try:
+        res = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, check=True)
+    except (subprocess.SubprocessError, OSError):
+        return None
+    return [entry for entry in res.stdout.split("\0") if entry]
+
+
+def git_changed_files(repo_dir: Path, since: str | None = None, staged: bool = False) -> set[Path] | None:
+    """Return absolute paths of Markdown files changed since a revision or staged in the index.
+
+    With ``since``, the working tree is compared against the revision and untracked
+    files are included so brand-new pages are picked up. Deleted files are skipped.
+    Returns None if git fails (e.g. unknown revision or not a repository).
+    """
+    diff = ["diff", "--name-only", "-z", "--relative", "--diff-filter=ACMR"]
+    if staged:
+        names = _git_lines([*diff, "--cached"], repo_dir)
+    else:
+        names = _git_lines([*diff, since], repo_dir)
+        untracked = _git_lines(["ls-files", "-z", "--others", "--exclude-standard"], repo_dir)
+        if names is not None and untracked is not None:
+            names += untracked
+    if names is None:
+        return None
+    return {repo_dir / name for name in names if name.endswith(MD_EXT)}
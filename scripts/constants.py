@@ -11,6 +11,39 @@ CONTENT_DIR = "content"
 STATIC_DIR = "static"
 ASSETS_DIR = "assets"
 ARCHETYPES_DIR = "archetypes"
+DATA_DIR = "data"
+
+# Generated Hugo data files (relative to DATA_DIR)
+RELATED_DATA_FILE = "related.json"
+
+# Local cache paths (relative to the project root)
+CACHE_DIR = ".cache"
+PARSE_CACHE_FILE = "parse.bin"
+INSIGHTS_STATE_FILE = "insights.bin"
+SIGNATURE_CACHE_FILE = "minhash.bin"
+EXTERNAL_CACHE_FILE = "external.bin"
+
+# External link checks: how long a probe result is trusted before the URL is probed again
+EXTERNAL_TTL_HOURS = 168
+# Requests in flight overall, and connections open to any one host
+EXTERNAL_CONCURRENCY = 32
+PER_HOST_CONNECTIONS = 4
+# Seconds allowed for one request, from connecting to the end of the response headers
+EXTERNAL_TIMEOUT = 15.0
+
+# Subcommand defaults, kept here so the CLI can offer them without importing the subcommand
+# Tag pairs at or above this Jaccard similarity are reported as redundant
+REDUNDANCY_THRESHOLD = 0.80
+SIMILARITY_METHODS = ("index", "bitset", "minhash")
+# Related pages kept per document, and the share of the score taken by tag overlap (Jaccard); the rest is TF-IDF cosine
+RELATED_TOP_K = 4
+RELATED_TAG_WEIGHT = 0.5
+DEDUP_THRESHOLD = 0.8
+# Default image budgets: a single image, and all distinct local images on one page
+ASSET_BUDGET_KB = 500
+PAGE_BUDGET_KB = 1500
+# git and gh queries in flight at once in check-sync; each one mostly waits on a subprocess or the network
+SYNC_WORKERS = 8
 
 # File Extensions
 MD_EXT = ".md"
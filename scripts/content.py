@@ -3,10 +3,10 @@ Logic for content normalization and updating Systology site pages.
 """
 
 import re
-from pathlib import Path
 
-from .constants import FM_DELIM, FM_DESC, FM_SUMMARY, FM_TITLE, MAX_DESC_LEN, MD_EXT
-from .utils import extract_fm_body, parse_fm
+from .constants import FM_DELIM, FM_DESC, FM_SUMMARY, FM_TITLE, MAX_DESC_LEN
+from .frontmatter import parse_frontmatter
+from .scanner import scan_markdown
 
 
 def has_frontmatter(lines: list[str]) -> bool:
@@ -26,9 +26,8 @@ def extract_first_h1(lines: list[str]) -> str | None:
     return None
 
 
-def normalize_file(path: Path) -> bool:
-    """Normalize the formatting and frontmatter of a single Markdown file."""
-    text = path.read_text(encoding="utf-8")
+def normalize_text(text: str) -> str:
+    """Normalize the formatting and frontmatter of a single Markdown text."""
     lines = text.splitlines()
     changed = False
 
@@ -41,63 +40,40 @@ def normalize_file(path: Path) -> bool:
                 break
 
     if has_frontmatter(lines):
-        if changed:
-            path.write_text("\n".join(lines) + "\n", encoding="utf-8")
-        return changed
+        return "\n".join(lines) + "\n" if changed else text
 
     title = extract_first_h1(lines)
     if title:
         fm = [FM_DELIM, f'{FM_TITLE}: "{title.replace('"', "''")}"', FM_DELIM, ""]
-        new = fm + lines
-        path.write_text("\n".join(new) + "\n", encoding="utf-8")
-        return True
-
-    if changed:
-        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
-        return True
-
-    return False
-
-
-def run_normalize(content_dir: Path) -> None:
-    """Run normalization across all Markdown files in the content directory."""
-    print("Running normalize_content...")
-    count = 0
-    for p in content_dir.rglob(f"*{MD_EXT}"):
-        if p.is_file() and normalize_file(p):
-            count += 1
-    print(f"  Normalized {count} files")
-
-
-def run_add_summary_desc(content_dir: Path) -> None:
-    """Ensure all Markdown files have summary and description frontmatter fields."""
-    print("Running add_summary_description...")
-    count = 0
-    for p in content_dir.rglob(f"*{MD_EXT}"):
-        text = p.read_text(encoding="utf-8")
-        fm_lines, body_lines = extract_fm_body(text)
-        if fm_lines is None:
-            continue
-
-        fm = parse_fm(fm_lines)
-        changed = False
-
-        # If missing summary or description, extract from body
-        if FM_SUMMARY not in fm or FM_DESC not in fm:
-            body_text = " ".join([line.strip() for line in body_lines if line.strip()])
-            body_text = re.sub(r"\{\{.*?\}\}", "", body_text)  # remove shortcodes
-            body_text = re.sub(r"\[(.*?)\]\(.*?\)", r"\1", body_text)  # remove links
-            snippet = body_text[:MAX_DESC_LEN].strip()
-            if snippet:
-                if FM_SUMMARY not in fm:
-                    fm_lines.append(f'{FM_SUMMARY}: "{snippet}..."')
-                    changed = True
-                if FM_DESC not in fm:
-                    fm_lines.append(f'{FM_DESC}: "{snippet}..."')
-                    changed = True
-
-        if changed:
-            new_text = FM_DELIM + "\n" + "\n".join(fm_lines) + "\n" + FM_DELIM + "\n" + "\n".join(body_lines) + "\n"
-            p.write_text(new_text, encoding="utf-8")
-            count += 1
-    print(f"  Updated {count} files")
+        return "\n".join(fm + lines) + "\n"
+
+    return "\n".join(lines) + "\n" if changed else text
+
+
+def add_summary_desc(text: str) -> str:
+    """Backfill missing summary and description frontmatter fields from the body."""
+    header = parse_frontmatter(text)
+    if header.lines is None:
+        return text
+
+    fm = header.fields
+    fm_lines = list(header.lines)
+    body_lines = text[header.body_offset :].splitlines()
+    changed = False
+
+    # If missing summary or description, extract from body
+    if FM_SUMMARY not in fm or FM_DESC not in fm:
+        # Prose without code, comments or shortcodes, with links and images reduced to their text
+        body_text = " ".join(scan_markdown(text, header.body_offset).prose.split())
+        snippet = body_text[:MAX_DESC_LEN].strip()
+        if snippet:
+            if FM_SUMMARY not in fm:
+                fm_lines.append(f'{FM_SUMMARY}: "{snippet}..."')
+                changed = True
+            if FM_DESC not in fm:
+                fm_lines.append(f'{FM_DESC}: "{snippet}..."')
+                changed = True
+
+    if not changed:
+        return text
+    return FM_DELIM + "\n" + "\n".join(fm_lines) + "\n" + FM_DELIM + "\n" + "\n".join(body_lines) + "\n"
@@ -0,0 +1,137 @@
+"""
+Shared in-memory document model for Systology content.
+"""
+
+from pathlib import Path
+
+from .constants import MD_EXT
+from .frontmatter import parse_frontmatter, read_header
+from .profiling import profiled
+from .utils import read_text, write_atomic
+
+
+class Document:
+    """A Markdown file read and parsed once, then shared by every pipeline stage.
+
+    Parsed fields are always present; the raw text is loaded on first access when
+    the document was restored from the parse cache or only its header was read. ``memo`` holds derived values
+    (such as token counts) that the cache persists alongside the parse.
+    """
+
+    __slots__ = ("_text", "body_offset", "fm", "fm_lines", "memo", "path", "tags")
+
+    def __init__(self, path: Path, text: str):
+        self.path = path
+        self.update(text)
+
+    @classmethod
+    def from_parsed(cls, path: Path, parsed: dict, text: str | None = None) -> "Document":
+        """Rebuild a document from previously parsed fields without re-parsing."""
+        doc = cls.__new__(cls)
+        doc.path = path
+        doc._text = text
+        doc.fm_lines = parsed["fm_lines"]
+        doc.fm = parsed["fm"]
+        doc.tags = parsed["tags"]
+        doc.body_offset = parsed["body_offset"]
+        doc.memo = parsed["memo"]
+        return doc
+
+    @classmethod
+    def from_header(cls, path: Path, header: str) -> "Document":
+        """Build a document from just the leading frontmatter block; the body is read on demand."""
+        doc = cls.__new__(cls)
+        doc.path = path
+        doc._parse(header)
+        doc._text = None
+        return doc
+
+    def parsed(self) -> dict:
+        """Return the parsed fields in a form accepted by from_parsed."""
+        return {
+            "fm_lines": self.fm_lines,
+            "fm": self.fm,
+            "tags": self.tags,
+            "body_offset": self.body_offset,
+            "memo": self.memo,
+        }
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = read_text(self.path)
+        return self._text
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the raw text is in memory, i.e. it was read or written during this run."""
+        return self._text is not None
+
+    def update(self, text: str) -> None:
+        """Replace the raw text and re-derive the parsed fields from it."""
+        self._text = text
+        self._parse(text)
+
+    def _parse(self, text: str) -> None:
+        header = parse_frontmatter(text)
+        self.fm_lines = header.lines
+        self.fm = header.values()
+        self.tags = header.tags
+        self.body_offset = header.body_offset
+        self.memo = {}
+
+    def write(self, text: str) -> None:
+        """Atomically persist new text to disk and refresh the parsed fields."""
+        write_atomic(self.path, text)
+        self.update(text)
+
+
+class Corpus:
+    """All Markdown documents under a root directory, in a stable path order."""
+
+    __slots__ = ("docs", "root", "unreadable")
+
+    def __init__(self, root: Path, docs: list[Document], unreadable: dict[Path, str]):
+        self.root = root
+        self.docs = docs
+        self.unreadable = unreadable
+
+    def __iter__(self):
+        return iter(self.docs)
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+
+@profiled("load_corpus")
+def load_corpus(root: Path, cache=None, only: set[Path] | None = None, header_only: bool = False) -> Corpus:
+    """Read and parse every Markdown file under root exactly once.
+
+    When a ParseCache is given, unchanged files are restored from it instead of
+    being read and parsed again. When ``only`` is given, just those paths under
+    root are loaded (used to scope per-file stages to changed files). With
+    ``header_only``, files are read only up to the closing frontmatter delimiter
+    and bodies are loaded lazily, for stages that mostly need metadata.
+    """
+    docs = []
+    unreadable = {}
+    if root.is_dir():
+        if only is None:
+            paths = sorted(root.rglob(f"*{MD_EXT}"))
+        else:
+            paths = sorted(p for p in only if p.suffix == MD_EXT and p.is_relative_to(root))
+        for p in paths:
+            if not p.is_file():
+                continue
+            try:
+                if cache is not None:
+                    doc = cache.open(p, header_only)
+                elif header_only:
+                    doc = Document.from_header(p, read_header(p))
+                else:
+                    doc = Document(p, read_text(p))
+            except OSError as e:
+                unreadable[p] = str(e)
+                continue
+            docs.append(doc)
+    return Corpus(root, docs, unreadable)
@@ -0,0 +1,162 @@
+"""
+Near-duplicate document detection with MinHash signatures and LSH banding.
+"""
+
+import hashlib
+import json
+from collections import defaultdict
+from pathlib import Path
+
+from .cache import content_digest, load_marshal, save_marshal
+from .constants import DEDUP_THRESHOLD
+from .corpus import Corpus
+from .insights import iter_word_chunks
+from .profiling import PROFILER, profiled
+from .scanner import scan_markdown
+from .similarity import MINHASH_PERMS, lsh_candidates, lsh_rows, one_permutation_signature
+from .utils import decode_text, parallel_map
+
+# Words per shingle; long enough that shared boilerplate phrases alone rarely match
+SHINGLE_SIZE = 5
+
+# Bump whenever shingling or the signature parameters change
+SIGNATURE_VERSION = 2
+
+
+def shingle_hashes(text: str, size: int = SHINGLE_SIZE) -> set[int]:
+    """Return stable, uniformly distributed 64-bit hashes of the overlapping word shingles of text."""
+    words = [w for chunk in iter_word_chunks(text) for w in chunk]
+    # Texts shorter than one shingle still get a single shingle of all their words
+    spans = (" ".join(words[i : i + size]) for i in range(max(1, len(words) - size + 1))) if words else ()
+    return {int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in spans}
+
+
+def body_signature(body: str) -> tuple[int, ...] | None:
+    """Return the MinHash signature of a document body's prose, or None if it has no words."""
+    shingles = shingle_hashes(scan_markdown(body).prose)
+    return one_permutation_signature(shingles) if shingles else None
+
+
+class SignatureCache:
+    """MinHash signatures keyed by the content digest of the file they were computed from.
+
+    Only signatures used by the current run are written back, so entries for
+    deleted or edited files drop out on the next save.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: dict[bytes, tuple[int, ...] | None] = {}
+        self.live: dict[bytes, tuple[int, ...] | None] = {}
+        self._load()
+
+    @profiled("signature_cache_load")
+    def _load(self) -> None:
+        data = load_marshal(self.path, SIGNATURE_VERSION)
+        if data is not None:
+            self.entries = data["entries"]
+
+    @profiled("signature_cache_save")
+    def save(self) -> None:
+        save_marshal(self.path, {"version": SIGNATURE_VERSION, "entries": self.live})
+
+
+@profiled("minhash_signatures")
+def collect_signatures(corpus: Corpus, cache: SignatureCache | None = None, jobs: int = 1) -> dict[str, tuple[int, ...]]:
+    """Return the MinHash signature of every document body with words, keyed by relative path.
+
+    Signatures are looked up by content digest in the cache first; the rest are
+    computed, possibly in parallel, and added to it.
+    """
+    keys, digests, found = [], [], {}
+    pending_keys, pending_bodies = [], []
+    for doc in corpus:
+        if doc.path.name.startswith(".") or doc.path.name == "_index.md":
+            continue
+        raw = doc.path.read_bytes()
+        PROFILER.record_read(len(raw))
+        key = str(doc.path.relative_to(corpus.root))
+        digest = content_digest(raw)
+        keys.append(key)
+        digests.append(digest)
+        if cache is not None and digest in cache.entries:
+            found[key] = cache.entries[digest]
+        else:
+            pending_keys.append(key)
+            pending_bodies.append(decode_text(raw)[doc.body_offset :])
+
+    found.update(zip(pending_keys, parallel_map(body_signature, pending_bodies, jobs)))
+    if cache is not None:
+        for key, digest in zip(keys, digests):
+            cache.live[digest] = found[key]
+    return {key: found[key] for key in keys if found[key] is not None}
+
+
+def estimated_jaccard(a: tuple[int, ...], b: tuple[int, ...]) -> float:
+    """Estimate Jaccard similarity as the fraction of matching signature components."""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+@profiled("find_duplicates")
+def find_duplicates(signatures: dict[str, tuple[int, ...]], threshold: float = DEDUP_THRESHOLD) -> list[dict]:
+    """Group documents into clusters of near-duplicates, largest first.
+
+    Only pairs that collide in an LSH band are compared, so the cost grows with
+    the number of documents and candidate pairs rather than all pairs. Clusters are
+    the connected components of the pairs whose estimated Jaccard similarity
+    reaches threshold.
+    """
+    pairs = []
+    for a, b in lsh_candidates(signatures, lsh_rows(MINHASH_PERMS, threshold)):
+        similarity = estimated_jaccard(signatures[a], signatures[b])
+        if similarity >= threshold:
+            pairs.append((a, b, similarity))
+
+    # Union-find with the smallest path as each component's root
+    parent: dict[str, str] = {}
+
+    def find(k: str) -> str:
+        while k in parent:
+            k = parent[k]
+        return k
+
+    for a, b, _ in pairs:
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+
+    members: dict[str, set[str]] = defaultdict(set)
+    cluster_pairs: dict[str, list[tuple[str, str, float]]] = defaultdict(list)
+    for a, b, similarity in pairs:
+        root = find(a)
+        members[root].update((a, b))
+        cluster_pairs[root].append((a, b, similarity))
+
+    clusters = [
+        {
+            "paths": sorted(members[root]),
+            "pairs": [{"a": a, "b": b, "similarity": round(s, 4)} for a, b, s in sorted(cluster_pairs[root], key=lambda p: (-p[2], p[0], p[1]))],
+        }
+        for root in members
+    ]
+    clusters.sort(key=lambda c: (-len(c["paths"]), c["paths"][0]))
+    return clusters
+
+
+def run_dedup(corpus: Corpus, threshold: float = DEDUP_THRESHOLD, json_out: bool = False, cache: SignatureCache | None = None, jobs: int = 1) -> None:
+    """Report clusters of near-duplicate documents by shingled-body MinHash similarity."""
+    clusters = find_duplicates(collect_signatures(corpus, cache, jobs), threshold)
+
+    if json_out:
+        print(json.dumps({"threshold": threshold, "clusters": clusters}, indent=2))
+        return
+
+    if not clusters:
+        print(f"No near-duplicate documents found (Jaccard >= {threshold:.2f}).")
+        return
+    total = sum(len(c["paths"]) for c in clusters)
+    print(f"Near-duplicates (Jaccard >= {threshold:.2f}): {total} documents in {len(clusters)} cluster{'s' if len(clusters) != 1 else ''}")
+    for i, c in enumerate(clusters, 1):
+        print(f"  [{i}] {', '.join(c['paths'])}")
+        for p in c["pairs"]:
+            print(f"    - {p['a']} / {p['b']} ({(p['similarity'] * 100):.0f}%)")
@@ -0,0 +1,259 @@
+"""
+Concurrent checking of external (http/https) links, with pooled connections and a TTL result cache.
+"""
+
+import asyncio
+import ssl
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from urllib.parse import quote, urldefrag, urljoin, urlsplit
+
+from .cache import load_marshal, save_marshal
+from .constants import EXTERNAL_CONCURRENCY, EXTERNAL_TIMEOUT, PER_HOST_CONNECTIONS
+from .corpus import Document
+from .profiling import profiled
+from .scanner import doc_outline
+
+# Bump whenever the layout of the persisted results changes
+EXTERNAL_CACHE_VERSION = 1
+
+MAX_REDIRECTS = 5
+USER_AGENT = "systology-linkcheck/1.0"
+
+# Status codes that say nothing about the link itself and are never cached
+RATE_LIMITED = 429
+
+
+def external_links(doc: Document) -> list[tuple[str, int, int]]:
+    """Return a page's http(s) link and image targets, with line and column."""
+    outline = doc_outline(doc)
+    return [item for item in outline["links"] + outline["images"] if item[0].startswith(("http://", "https://"))]
+
+
+def describe(status: int | None, error: str | None) -> str | None:
+    """Return why a probe result counts as broken, or None if the link works (or could not be judged)."""
+    if error is not None:
+        return error
+    if status is None or status < 400 or status == RATE_LIMITED:
+        return None
+    return f"HTTP {status}"
+
+
+class ExternalCache:
+    """Probe results keyed by URL (without fragment), each trusted for ttl seconds after it was taken.
+
+    Only results that say something lasting about the link are stored: network
+    errors, rate limiting and server errors are probed again on the next run.
+    """
+
+    def __init__(self, path: Path, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        self.entries: dict[str, tuple[float, int | None, str | None]] = {}
+        self._load()
+
+    @profiled("external_cache_load")
+    def _load(self) -> None:
+        data = load_marshal(self.path, EXTERNAL_CACHE_VERSION)
+        if data is not None:
+            self.entries = data["entries"]
+
+    def get(self, url: str, now: float) -> tuple[int | None, str | None] | None:
+        """Return the cached (status, error) for url if it has not expired."""
+        entry = self.entries.get(url)
+        if entry is None or now - entry[0] >= self.ttl:
+            return None
+        return entry[1], entry[2]
+
+    def put(self, url: str, status: int | None, error: str | None, now: float) -> None:
+        if error is None and status is not None and status < 500 and status != RATE_LIMITED:
+            self.entries[url] = (now, status, error)
+
+    @profiled("external_cache_save")
+    def save(self, now: float) -> None:
+        """Persist unexpired results, dropping the rest."""
+        live = {url: entry for url, entry in self.entries.items() if now - entry[0] < self.ttl}
+        save_marshal(self.path, {"version": EXTERNAL_CACHE_VERSION, "entries": live})
+
+
+class HostPool:
+    """Idle keep-alive connections to one scheme/host/port, and a cap on connections in use."""
+
+    __slots__ = ("host", "idle", "limit", "port", "tls")
+
+    def __init__(self, host: str, port: int, tls: ssl.SSLContext | None, per_host: int):
+        self.host = host
+        self.port = port
+        self.tls = tls
+        self.idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self.limit = asyncio.Semaphore(per_host)
+
+    async def connect(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter, bool]:
+        """Return a connection and whether it was reused from the idle list."""
+        while self.idle:
+            reader, writer = self.idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.tls, server_hostname=self.host if self.tls else None)
+        return reader, writer, False
+
+    def release(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, reusable: bool) -> None:
+        if reusable and not writer.is_closing():
+            self.idle.append((reader, writer))
+        else:
+            writer.close()
+
+    def close(self) -> None:
+        for _, writer in self.idle:
+            writer.close()
+        self.idle.clear()
+
+
+async def read_response(reader: asyncio.StreamReader) -> tuple[str, int, dict[str, str]]:
+    """Read a status line and headers, skipping interim 1xx responses; the body is left unread."""
+    while True:
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed before a response")
+        parts = status_line.decode("latin-1").split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+            raise ValueError(f"malformed status line {status_line[:40]!r}")
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        status = int(parts[1])
+        if not 100 <= status < 200:
+            return parts[0], status, headers
+
+
+class ExternalChecker:
+    """Probes URLs concurrently: HEAD first, then GET when HEAD is refused or fails, following redirects.
+
+    Connections are pooled per host and HEAD connections kept alive for reuse; at
+    most ``concurrency`` requests are in flight and ``per_host`` per host. Results
+    come from and go to ``cache`` when one is given.
+    """
+
+    __slots__ = ("cache", "concurrency", "per_host", "timeout", "tls")
+
+    def __init__(
+        self,
+        cache: ExternalCache | None = None,
+        concurrency: int = EXTERNAL_CONCURRENCY,
+        per_host: int = PER_HOST_CONNECTIONS,
+        timeout: float = EXTERNAL_TIMEOUT,
+        tls: ssl.SSLContext | None = None,
+    ):
+        self.cache = cache
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.tls = tls
+
+    @profiled("external_links")
+    def check(self, urls: Iterable[str]) -> tuple[dict[str, str | None], int]:
+        """Return why each URL is broken (None if it works) and how many were probed rather than cached."""
+        now = time.time()
+        results: dict[str, str | None] = {}
+        pending = []
+        for url in dict.fromkeys(urldefrag(u)[0] for u in urls):
+            cached = self.cache.get(url, now) if self.cache is not None else None
+            if cached is None:
+                pending.append(url)
+            else:
+                results[url] = describe(*cached)
+        if pending:
+            for url, (status, error) in zip(pending, asyncio.run(self._probe_all(pending))):
+                results[url] = describe(status, error)
+                if self.cache is not None:
+                    self.cache.put(url, status, error, now)
+        if self.cache is not None:
+            self.cache.save(now)
+        return results, len(pending)
+
+    async def _probe_all(self, urls: list[str]) -> list[tuple[int | None, str | None]]:
+        pools: dict[tuple[str, str, int], HostPool] = {}
+        inflight = asyncio.Semaphore(self.concurrency)
+        tls = self.tls or ssl.create_default_context()
+        try:
+            return await asyncio.gather(*(self._probe(url, pools, inflight, tls) for url in urls))
+        finally:
+            for pool in pools.values():
+                pool.close()
+
+    async def _probe(self, url: str, pools: dict, inflight: asyncio.Semaphore, tls: ssl.SSLContext) -> tuple[int | None, str | None]:
+        status, error = await self._follow("HEAD", url, pools, inflight, tls)
+        # Plenty of servers reject or mishandle HEAD, so only a GET can condemn a link
+        if (status is not None and status >= 400) or error in ("connection reset", "malformed response"):
+            status, error = await self._follow("GET", url, pools, inflight, tls)
+        return status, error
+
+    async def _follow(self, method: str, url: str, pools: dict, inflight: asyncio.Semaphore, tls: ssl.SSLContext) -> tuple[int | None, str | None]:
+        """Request url, following redirects; return the final status or an error."""
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            if parts.scheme not in ("http", "https") or not parts.hostname:
+                return None, f"unsupported URL {url}"
+            try:
+                host = parts.hostname.encode("idna").decode("ascii")
+                port = parts.port or (443 if parts.scheme == "https" else 80)
+            except (UnicodeError, ValueError):
+                return None, "invalid host"
+            key = (parts.scheme, host, port)
+            pool = pools.get(key)
+            if pool is None:
+                pool = pools[key] = HostPool(host, port, tls if parts.scheme == "https" else None, self.per_host)
+            # Already-escaped characters pass through; anything else not allowed on the wire is percent-encoded
+            target = quote((parts.path or "/") + (f"?{parts.query}" if parts.query else ""), safe="/?&=%:@!$'()*+,;~")
+            host_header = host if parts.port is None else f"{host}:{port}"
+            try:
+                async with pool.limit, inflight, asyncio.timeout(self.timeout):
+                    status, location = await self._request(pool, method, target, host_header)
+            except TimeoutError:
+                return None, "timed out"
+            except ConnectionRefusedError:
+                return None, "connection refused"
+            except ConnectionResetError:
+                return None, "connection reset"
+            except ssl.SSLError as e:
+                # Checked first: certificate failures are also ValueErrors
+                return None, f"TLS error ({e.reason or e})"
+            except ValueError:
+                return None, "malformed response"
+            except OSError as e:
+                return None, e.strerror or str(e) or type(e).__name__
+            if 300 <= status < 400 and location:
+                url = urljoin(url, location)
+                continue
+            return status, None
+        return None, "too many redirects"
+
+    @staticmethod
+    async def _request(pool: HostPool, method: str, target: str, host_header: str) -> tuple[int, str | None]:
+        """Send one request on a pooled connection, retrying once on a fresh one if a reused connection went stale."""
+        request = (
+            f"{method} {target} HTTP/1.1\r\nHost: {host_header}\r\nUser-Agent: {USER_AGENT}\r\nAccept: */*\r\n"
+            f"Connection: {'keep-alive' if method == 'HEAD' else 'close'}\r\n\r\n"
+        ).encode("latin-1")
+        while True:
+            reader, writer, reused = await pool.connect()
+            try:
+                writer.write(request)
+                await writer.drain()
+                version, status, headers = await read_response(reader)
+            except (ConnectionError, ValueError):
+                writer.close()
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                writer.close()
+                raise
+            # A HEAD response has no body, so its connection is ready for the next request;
+            # a GET body is never read, so that connection cannot be reused
+            reusable = method == "HEAD" and version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+            pool.release(reader, writer, reusable)
+            return status, headers.get("location")
@@ -0,0 +1,197 @@
+"""
+Single-pass frontmatter tokenizer shared by every Systology script.
+"""
+
+import re
+from pathlib import Path
+
+from .constants import FM_DELIM, FM_TAGS
+from .profiling import PROFILER
+from .utils import decode_text, strip_quotes
+
+# Field kinds
+SCALAR = "scalar"
+INLINE_LIST = "inline"
+BLOCK_LIST = "block"
+
+FIELD_RE = re.compile(r"\s*([A-Za-z0-9_\-]+)\s*:\s*(.*)")
+VALUE_RE = re.compile(r"\"([^\"]*)\"|'([^']*)'|([^#].*)")
+INLINE_RE = re.compile(r"\[([^\]]*)\]")
+ITEM_RE = re.compile(r"\s*-\s+(.+)")
+
+
+class Field:
+    """A top-level frontmatter entry and its source span.
+
+    ``start``/``end`` are character offsets in the original text, from the first
+    character of the key through the end of the value (the closing bracket of an
+    inline list, or the last item of a block list). ``value`` mirrors the plain
+    scalar reading of the line; ``items`` holds the unquoted list entries.
+    """
+
+    __slots__ = ("end", "items", "key", "kind", "start", "value")
+
+    def __init__(self, key: str, kind: str, value: str, items: list[str], start: int, end: int):
+        self.key = key
+        self.kind = kind
+        self.value = value
+        self.items = items
+        self.start = start
+        self.end = end
+
+
+class Frontmatter:
+    """The tokenized header of a Markdown text.
+
+    ``lines`` is None when the text has no (terminated) ``---`` frontmatter block.
+    ``body_offset`` is the character offset where the body starts.
+    """
+
+    __slots__ = ("body_offset", "fields", "lines")
+
+    def __init__(self, lines: list[str] | None, fields: dict[str, Field], body_offset: int):
+        self.lines = lines
+        self.fields = fields
+        self.body_offset = body_offset
+
+    def values(self) -> dict[str, str]:
+        """Return a key to scalar-value mapping of every field."""
+        return {key: f.value for key, f in self.fields.items()}
+
+    @property
+    def tags(self) -> list[str]:
+        field = self.fields.get(FM_TAGS)
+        return list(field.items) if field is not None else []
+
+
+def scalar_value(raw: str) -> str:
+    """Read a raw frontmatter value as a plain scalar, unquoting and dropping comments."""
+    m = VALUE_RE.match(raw)
+    if not m:
+        return ""
+    return m.group(1) or m.group(2) or (m.group(3).strip() if m.group(3) else "")
+
+
+def continue_flow_list(text: str, value_start: int, eol: int, lines: list[str]) -> tuple[str, int]:
+    """Extend an unclosed ``[`` value over the indented lines that follow it.
+
+    Returns the raw value from ``value_start`` through the line holding the
+    closing bracket, and the end of that line; the consumed lines are appended to
+    ``lines``. If no bracket closes the list before a non-indented line or the
+    closing delimiter, the first line is returned unchanged.
+    """
+    n = len(text)
+    end = eol
+    consumed = []
+    while end < n:
+        nxt = end + 1
+        end = text.find("\n", nxt)
+        end = n if end < 0 else end
+        line = text[nxt:end]
+        if not line[:1].isspace() or line.strip() == FM_DELIM:
+            break
+        consumed.append(line)
+        if "]" in line:
+            lines.extend(consumed)
+            return text[value_start:end].rstrip(), end
+    return text[value_start:eol].rstrip(), eol
+
+
+def parse_frontmatter(text: str) -> Frontmatter:
+    """Tokenize the frontmatter of a Markdown text in one pass over the header.
+
+    Leading blank lines are skipped; scanning stops at the closing delimiter, so
+    the body is never examined. Only ``\\n`` line endings are recognized, which is
+    what Path.read_text produces.
+    """
+    pos = 0
+    n = len(text)
+
+    # Skip leading blank lines
+    while pos < n:
+        eol = text.find("\n", pos)
+        eol = n if eol < 0 else eol
+        if text[pos:eol].strip():
+            break
+        pos = eol + 1
+    first = min(pos, n)
+
+    eol = text.find("\n", first)
+    eol = n if eol < 0 else eol
+    if text[first:eol].strip() != FM_DELIM:
+        return Frontmatter(None, {}, first)
+
+    lines: list[str] = []
+    fields: dict[str, Field] = {}
+    block: Field | None = None
+    pos = eol + 1
+    while pos < n:
+        eol = text.find("\n", pos)
+        eol = n if eol < 0 else eol
+        line = text[pos:eol]
+        if line.strip() == FM_DELIM:
+            return Frontmatter(lines, fields, min(eol + 1, n))
+        lines.append(line)
+
+        if block is not None:
+            m = ITEM_RE.match(line)
+            if m:
+                block.items.append(strip_quotes(m.group(1).strip()))
+                block.end = pos + len(line.rstrip())
+                pos = eol + 1
+                continue
+            if line.strip() and not line[0].isspace():
+                block = None
+
+        m = FIELD_RE.match(line)
+        if m:
+            key, raw = m.group(1), m.group(2).rstrip()
+            start = pos + m.start(1)
+            if raw.startswith("[") and "]" not in raw:
+                raw, eol = continue_flow_list(text, pos + m.start(2), eol, lines)
+            inline = INLINE_RE.match(raw)
+            if inline:
+                items = [strip_quotes(p) for p in inline.group(1).split(",") if p.strip()]
+                field = Field(key, INLINE_LIST, scalar_value(raw), items, start, pos + m.start(2) + inline.end())
+            elif raw:
+                field = Field(key, SCALAR, scalar_value(raw), [strip_quotes(raw)], start, pos + m.start(2) + len(raw))
+            else:
+                field = Field(key, BLOCK_LIST, "", [], start, pos + m.end(1))
+                block = field
+            fields[key] = field
+        pos = eol + 1
+
+    # Unterminated frontmatter is treated as body text
+    return Frontmatter(None, {}, first)
+
+
+def read_header(path: Path) -> str:
+    """Read a Markdown file only up to the end of its frontmatter block.
+
+    Lines are streamed until the closing delimiter (or the first non-blank line
+    when there is no frontmatter), so long bodies are never read. Parsing the
+    returned prefix yields the same fields and body offset as the whole file.
+    """
+    delim = FM_DELIM.encode()
+    chunks = []
+    opened = False
+    with open(path, "rb") as f:
+        for line in f:
+            chunks.append(line)
+            stripped = line.strip()
+            if not opened:
+                if not stripped:
+                    continue
+                if stripped != delim:
+                    break
+                opened = True
+            elif stripped == delim:
+                break
+    raw = b"".join(chunks)
+    PROFILER.record_read(len(raw))
+    return decode_text(raw)
+
+
+def replace_field(text: str, field: Field, replacement: str) -> str:
+    """Replace a field's source span (key through value) with new text."""
+    return text[: field.start] + replacement + text[field.end :]
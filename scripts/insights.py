@@ -2,14 +2,21 @@
 Logic for analyzing tag insights and generating optimization recommendations.
 """
 
+import heapq
 import math
 import re
+import sys
 from collections import Counter, defaultdict
-from pathlib import Path
+from collections.abc import Iterable, Iterator
+from itertools import filterfalse
 
-from scripts.constants import MD_EXT
-from scripts.metadata import parse_tags_from_text
-from scripts.utils import extract_fm_body
+from scripts.constants import FM_SUMMARY, FM_TITLE, REDUNDANCY_THRESHOLD
+from scripts.corpus import Corpus, Document
+from scripts.jsonstream import JsonArray, JsonObject, write_json, write_ndjson
+from scripts.profiling import profiled, profiled_iter
+from scripts.scanner import scan_doc, scan_markdown
+from scripts.similarity import jaccard_pairs
+from scripts.utils import parallel_map
 
 # A practical set of English stop words to ensure our TF-IDF doesn't just recommend "the" or "and"
 STOP_WORDS = {
@@ -214,61 +221,92 @@ STOP_WORDS = {
     "system",
 }
 
+WORD_RE = re.compile(r"\b[a-z]{4,}\b")
+# Approximate slice length (in characters) for streaming tokenization
+TOKEN_CHUNK = 16 * 1024
 
-def get_words(text: str, multiplier: int = 1) -> list[str]:
-    """Tokenize text into lowercase words (length >= 4)."""
-    # Remove code blocks and shortcodes
-    text = re.sub(r"```.*?```", " ", text, flags=re.DOTALL)
-    text = re.sub(r"`.*?`", " ", text)
-    text = re.sub(r"{{.*?}}", " ", text)
+# Title and summary words count this many times over body words
+META_WEIGHT = 5
 
-    # Extract words (at least 4 chars)
-    words = re.findall(r"\b[a-z]{4,}\b", text.lower())
-    res = [w for w in words if w not in STOP_WORDS]
-    return res * multiplier
 
+def iter_word_chunks(text: str) -> Iterator[Iterator[str]]:
+    """Yield the lowercase words (length >= 4) of text, minus stop words.
 
-def collect_docs(content_dir: Path) -> tuple[list[dict], set[str]]:
-    """Walk content and collect tags and tokenized words."""
+    Callers pass prose from the Markdown scanner, so code and shortcodes are
+    already gone. The text is tokenized in slices cut at spaces, so a document's
+    full token list is never built; stop words are filtered as the tokens stream past.
+    """
+    text = text.lower()
+    pos, n = 0, len(text)
+    while pos < n:
+        end = text.find(" ", pos + TOKEN_CHUNK)
+        end = n if end < 0 else end
+        yield filterfalse(STOP_WORDS.__contains__, WORD_RE.findall(text, pos, end))
+        pos = end
+
+
+def count_words(text: str, counts: Counter, weight: int = 1) -> None:
+    """Add weighted counts of the words iter_word_chunks finds in text to counts."""
+    for words in iter_word_chunks(text):
+        if weight == 1:
+            counts.update(words)
+        else:
+            for word in words:
+                counts[word] += weight
+
+
+def tokenize_doc(doc: Document) -> Counter:
+    """Return weighted token counts for a document's body and title/summary."""
+    counts = Counter()
+    count_words(scan_doc(doc).prose, counts)
+    # Meta weighting: prioritize core topics from frontmatter
+    meta_text = " ".join(doc.fm.get(key, "") for key in (FM_TITLE, FM_SUMMARY))
+    count_words(scan_markdown(meta_text).prose, counts, weight=META_WEIGHT)
+    return counts
+
+
+def doc_word_counts(doc: Document) -> dict[str, int]:
+    """Return weighted token counts for a document, memoized so the parse cache can persist them.
+
+    Keys are interned so documents share one string object per vocabulary word.
+    """
+    word_counts = doc.memo.get("words")
+    if word_counts is None:
+        word_counts = doc.memo["words"] = {sys.intern(w): n for w, n in tokenize_doc(doc).items()}
+    return word_counts
+
+
+@profiled("collect_docs")
+def collect_docs(corpus: Corpus, jobs: int = 1) -> tuple[list[dict], set[str]]:
+    """Walk the corpus and collect tags and tokenized words."""
     docs = []
     global_tags = set()
 
-    for p in content_dir.rglob(f"*{MD_EXT}"):
-        if p.name.startswith(".") or p.name == "_index.md":
-            continue
-
-        try:
-            text = p.read_text(encoding="utf-8")
-        except OSError:
-            continue
+    selected = [doc for doc in corpus if not doc.path.name.startswith(".") and doc.path.name != "_index.md"]
+    # Tokenize documents missing from the parse cache up front, possibly in parallel
+    pending = [doc for doc in selected if "words" not in doc.memo]
+    for doc, word_counts in zip(pending, parallel_map(doc_word_counts, pending, jobs)):
+        # Results pickled back from worker processes lose their interning
+        doc.memo["words"] = {sys.intern(w): n for w, n in word_counts.items()} if jobs > 1 else word_counts
 
-        fm_lines, body_lines = extract_fm_body(text)
-        tags = parse_tags_from_text(text) if fm_lines is not None else []
+    for doc in selected:
+        tags = doc.tags if doc.fm_lines is not None else []
         for t in tags:
             global_tags.add(t)
 
-        # Meta weighting: prioritize core topics from frontmatter
-        meta_text = ""
-        if fm_lines:
-            # Simple metadata extraction for weighting
-            for line in fm_lines:
-                if line.startswith(("title:", "summary:")):
-                    meta_text += " " + line.split(":", 1)[1]
-
-        body_text = "\n".join(body_lines) if body_lines else ""
-        words = get_words(body_text) + get_words(meta_text, multiplier=5)
-
+        word_counts = doc_word_counts(doc)
         docs.append(
             {
-                "path": p.relative_to(content_dir),
+                "path": doc.path.relative_to(corpus.root),
                 "tags": set(tags),
-                "words": words,
-                "word_counts": Counter(words),
+                "length": sum(word_counts.values()),
+                "word_counts": word_counts,
             }
         )
     return docs, global_tags
 
 
+@profiled("report_tag_distribution")
 def report_tag_distribution(docs: list[dict]) -> None:
     """Analyze and print tag usage statistics and guideline adherence."""
     tag_counts = Counter()
@@ -302,6 +340,7 @@ def report_tag_distribution(docs: list[dict]) -> None:
             print(f"  [OVERFLOW] {p}: {count} tags (Recommend 3-5)")
 
 
+@profiled("collect_tag_distribution")
 def collect_tag_distribution(docs: list[dict]) -> dict:
     """Return tag distribution stats and guideline violations as structured data."""
     tag_counts = Counter()
@@ -333,49 +372,48 @@ def collect_tag_distribution(docs: list[dict]) -> dict:
     }
 
 
-def report_tag_cooccurrence(docs: list[dict]) -> None:
-    """Analyze and print tag co-occurrence (Jaccard Similarity)."""
-    redundancies = collect_tag_cooccurrence(docs)
-    if redundancies:
-        print("Redundant (Jaccard >= 0.80):")
-        for r in redundancies:
-            print(f"  - {r['tag_a']} / {r['tag_b']} ({(r['jaccard'] * 100):.0f}%)")
-
-
-def collect_tag_cooccurrence(docs: list[dict]) -> list[dict]:
-    """Return redundant tag pairs (Jaccard >= 0.80) as structured data."""
+@profiled("collect_tag_cooccurrence")
+def collect_tag_cooccurrence(docs: list[dict], threshold: float = REDUNDANCY_THRESHOLD, top: int = 0, method: str = "index") -> list[dict]:
+    """Return redundant tag pairs (Jaccard >= threshold) as structured data, most similar first."""
     tag_to_docs: dict[str, set[int]] = defaultdict(set)
     for i, d in enumerate(docs):
-        for t in d["tags"]:
+        # Sorted so first-seen tag order (the tie-break below) does not depend on set hashing
+        for t in sorted(d["tags"]):
             tag_to_docs[t].add(i)
 
-    tags_list = list(tag_to_docs.keys())
-    threshold = 0.80
-    redundancies = []
-
-    for i in range(len(tags_list)):
-        for j in range(i + 1, len(tags_list)):
-            tA, tB = tags_list[i], tags_list[j]
-            docsA, docsB = tag_to_docs[tA], tag_to_docs[tB]
-            intersection = len(docsA & docsB)
-            union = len(docsA | docsB)
-            if union > 0:
-                jaccard = intersection / union
-                if jaccard >= threshold:
-                    redundancies.append({"tag_a": tA, "tag_b": tB, "jaccard": round(jaccard, 4)})
-
-    return sorted(redundancies, key=lambda x: -x["jaccard"])
+    rank = {t: i for i, t in enumerate(tag_to_docs)}
+    pairs = jaccard_pairs(tag_to_docs, threshold, method)
+    redundancies = [
+        {"tag_a": a, "tag_b": b, "jaccard": round(jaccard, 4)} for a, b, jaccard in sorted(pairs, key=lambda p: (-round(p[2], 4), rank[p[0]], rank[p[1]]))
+    ]
+    return redundancies[:top] if top > 0 else redundancies
+
+
+def report_tag_cooccurrence(
+    docs: list[dict],
+    threshold: float = REDUNDANCY_THRESHOLD,
+    top: int = 0,
+    method: str = "index",
+    redundancies: list[dict] | None = None,
+) -> None:
+    """Analyze and print tag co-occurrence (Jaccard Similarity), unless already computed."""
+    if redundancies is None:
+        redundancies = collect_tag_cooccurrence(docs, threshold, top, method)
+    if redundancies:
+        print(f"Redundant (Jaccard >= {threshold:.2f}):")
+        for r in redundancies:
+            print(f"  - {r['tag_a']} / {r['tag_b']} ({(r['jaccard'] * 100):.0f}%)")
 
 
-def report_tag_recommendations(docs: list[dict], global_tags: set[str]) -> None:
-    """Analyze TF-IDF scores and print tag recommendations grouped by section."""
-    recommendations = collect_tag_recommendations(docs, global_tags)
+def report_tag_recommendations(docs: list[dict], global_tags: set[str], recommendations: dict | None = None) -> None:
+    """Analyze TF-IDF scores (unless already computed) and print tag recommendations grouped by section."""
+    if recommendations is None:
+        recommendations = collect_tag_recommendations(docs, global_tags)
     if recommendations:
         print("\nRecommendations (Found [Existing] or New Candidates):")
         sections = defaultdict(list)
         for path, recs in recommendations.items():
-            section = path.split("/", 1)[0] if "/" in path else "other"
-            sections[section].append((path, recs))
+            sections[section_of(path)].append((path, recs))
 
         for section in sorted(sections.keys()):
             print(f"  [{section.upper()}]")
@@ -384,122 +422,248 @@ def report_tag_recommendations(docs: list[dict], global_tags: set[str]) -> None:
                 print(f"    {path}: {', '.join(res_list)}")
 
 
+def compound_tag_index(global_tags: set[str], df: Counter) -> dict[str, list[tuple[str, list[str]]]]:
+    """Index hyphenated tags by their rarest component word.
+
+    A document can only contain every part of a tag if it contains the rarest one,
+    so each document needs to look up just the words in its own vocabulary.
+    """
+    index: dict[str, list[tuple[str, list[str]]]] = defaultdict(list)
+    for t in global_tags:
+        parts = t.split("-")
+        if len(parts) > 1:
+            index[min(parts, key=lambda p: df[p])].append((t, parts))
+    return index
+
+
+@profiled("collect_tag_recommendations")
 def collect_tag_recommendations(docs: list[dict], global_tags: set[str]) -> dict:
     """Return TF-IDF tag recommendations as structured data keyed by file path."""
-    total_docs = len(docs)
+    return dict(iter_tag_recommendations(docs, global_tags))
+
+
+def document_frequencies(docs: list[dict]) -> Counter:
+    """Return the number of documents each word appears in."""
     df = Counter()
     for d in docs:
-        for w in set(d["words"]):
-            df[w] += 1
+        df.update(d["word_counts"].keys())
+    return df
 
-    recommendations: dict[str, dict] = {}
-    for d in docs:
-        doc_path = str(d["path"])
-        doc_length = len(d["words"])
-        if doc_length == 0:
+
+def recommend_tags(d: dict, idf: dict[str, float], df: Counter, global_tags: set[str], compound_tags: dict) -> dict | None:
+    """Return the TF-IDF tag recommendations for one document, or None if there are none.
+
+    Words are popped from a heap in descending score order (ties in insertion
+    order, like a stable sort) since only the first few are ever used.
+    """
+    doc_length = d["length"]
+    if doc_length == 0:
+        return None
+
+    heap = [(-((tf / doc_length) * idf[w]), i, w) for i, (w, tf) in enumerate(d["word_counts"].items())]
+    heapq.heapify(heap)
+    established_finds: set[str] = set()
+    new_candidates: list[str] = []
+
+    for w in d["word_counts"]:
+        for t, parts in compound_tags.get(w, ()):
+            if t not in d["tags"] and all(p in d["word_counts"] for p in parts):
+                established_finds.add(t)
+
+    while heap:
+        w = heapq.heappop(heap)[2]
+        if w in d["tags"] or w in established_finds:
             continue
+        if w in global_tags:
+            established_finds.add(w)
+        elif df[w] >= 3:
+            new_candidates.append(w)
+        if len(established_finds) + len(new_candidates) >= 3:
+            break
 
-        doc_scores = {}
-        for w, tf in d["word_counts"].items():
-            idf = math.log(total_docs / (1 + df[w]))
-            doc_scores[w] = (tf / doc_length) * idf
+    if not (established_finds or new_candidates):
+        return None
+    return {"established": sorted(established_finds), "new_candidates": new_candidates}
 
-        top_words = sorted(doc_scores.items(), key=lambda x: x[1], reverse=True)
-        established_finds: set[str] = set()
-        new_candidates: list[str] = []
 
-        for t in global_tags:
-            if t in d["tags"]:
-                continue
-            parts = t.split("-")
-            if len(parts) > 1 and all(p in d["word_counts"] for p in parts):
-                established_finds.add(t)
+def iter_tag_recommendations(docs: list[dict], global_tags: set[str]) -> Iterator[tuple[str, dict]]:
+    """Yield ``(path, recommendations)`` for each document with TF-IDF tag recommendations."""
+    total_docs = len(docs)
+    df = document_frequencies(docs)
+    idf = {w: math.log(total_docs / (1 + n)) for w, n in df.items()}
+    compound_tags = compound_tag_index(global_tags, df)
+
+    for d in docs:
+        recs = recommend_tags(d, idf, df, global_tags, compound_tags)
+        if recs is not None:
+            yield str(d["path"]), recs
 
-        for w, _ in top_words:
-            if w in d["tags"] or w in established_finds:
-                continue
-            if w in global_tags:
-                established_finds.add(w)
-            elif df[w] >= 3:
-                new_candidates.append(w)
-            if len(established_finds) + len(new_candidates) >= 3:
-                break
-
-        if established_finds or new_candidates:
-            recommendations[doc_path] = {
-                "established": sorted(established_finds),
-                "new_candidates": new_candidates,
-            }
 
-    return recommendations
+def section_of(path: str) -> str:
+    """Return the top-level content section of a relative document path."""
+    return path.split("/", 1)[0] if "/" in path else "other"
 
 
-def report_cross_references(docs: list[dict], verbose: bool = False) -> None:
+def report_cross_references(
+    docs: list[dict],
+    verbose: bool = False,
+    top_k: int = 0,
+    min_shared: int = 1,
+    counts: list[tuple[int, int, int]] | None = None,
+) -> None:
     """Print a summarized or detailed cross-section tag-based linking map."""
-    pairs = collect_cross_references(docs)
-    if not pairs:
+    if counts is None:
+        counts = cross_reference_counts(docs, top_k, min_shared)
+    if not counts:
         return
 
-    total = len(pairs)
+    total = len(counts)
     print(f"\nCross-References (Shared Tags Across Sections): {total} links")
     if verbose:
-        for entry in pairs:
+        for entry in iter_cross_references(docs, counts):
             print(f"  {entry['a']} <-> {entry['b']}: {', '.join(entry['shared_tags'])}")
 
 
-def collect_cross_references(docs: list[dict]) -> list[dict]:
-    """Return cross-section document pairs and their shared tags as structured data."""
-    tag_to_docs: dict[str, list[tuple[str, str]]] = defaultdict(list)
-    for d in docs:
-        doc_path = str(d["path"])
-        section = doc_path.split("/", 1)[0] if "/" in doc_path else "other"
-        for t in d["tags"]:
-            tag_to_docs[t].append((section, doc_path))
-
-    pair_tags: dict[tuple[str, str], set[str]] = defaultdict(set)
-    for tag, entries in tag_to_docs.items():
-        sections_present = {s for s, _ in entries}
-        if len(sections_present) < 2:
-            continue
-        paths = [p for _, p in entries]
-        for i in range(len(paths)):
-            for j in range(i + 1, len(paths)):
-                if entries[i][0] == entries[j][0]:
-                    continue
-                key = (min(paths[i], paths[j]), max(paths[i], paths[j]))
-                pair_tags[key].add(tag)
-
-    sorted_pairs = sorted(pair_tags.items(), key=lambda x: (-len(x[1]), x[0]))
-    return [{"a": a, "b": b, "shared_tags": sorted(shared)} for (a, b), shared in sorted_pairs]
+@profiled("cross_reference_counts")
+def cross_reference_counts(docs: list[dict], top_k: int = 0, min_shared: int = 1) -> list[tuple[int, int, int]]:
+    """Return ``(shared, i, j)`` for cross-section document pairs, most shared tags first.
 
+    Shared-tag counts are the off-diagonal entries of the sparse product of the
+    doc-tag incidence matrix with its transpose, accumulated one document row at a
+    time. Only pairs with at least ``min_shared`` tags are kept; with ``top_k`` each
+    document keeps just its k strongest links (a pair survives if either end keeps it).
+    """
+    paths = [str(d["path"]) for d in docs]
+    sections = [section_of(p) for p in paths]
+    # Compare documents by path rank rather than by path string in the inner loop
+    order = sorted(range(len(docs)), key=paths.__getitem__)
+    rank = [0] * len(docs)
+    for r, i in enumerate(order):
+        rank[i] = r
+
+    tag_to_docs: dict[str, list[int]] = defaultdict(list)
+    for i, d in enumerate(docs):
+        for t in d["tags"]:
+            tag_to_docs[t].append(i)
+    # A tag confined to one section cannot link across sections
+    postings = {t: ids for t, ids in tag_to_docs.items() if len({sections[i] for i in ids}) > 1}
 
-def generate_insights(content_dir: Path, json_out: bool = False, verbose: bool = False) -> None:
+    # Bucket pairs by shared count, packing (lower rank, higher rank) into one int for a cheap sort
+    size = len(docs)
+    buckets: dict[int, set[int]] = defaultdict(set)
+    for i, d in enumerate(docs):
+        section, r = sections[i], rank[i]
+        # Without a per-document limit each unordered pair is counted from its lower-ranked end only
+        low = -1 if top_k else r
+        row = Counter(j for t in d["tags"] for j in postings.get(t, ()) if rank[j] > low and sections[j] != section)
+        entries = [(-n, rank[j]) for j, n in row.items() if n >= min_shared]
+        if top_k:
+            entries = heapq.nsmallest(top_k, entries)
+        for neg, rj in entries:
+            buckets[-neg].add(r * size + rj if r < rj else rj * size + r)
+
+    pairs = []
+    for n in sorted(buckets, reverse=True):
+        for key in sorted(buckets[n]):
+            ra, rb = divmod(key, size)
+            pairs.append((n, order[ra], order[rb]))
+    return pairs
+
+
+def iter_cross_references(docs: list[dict], counts: list[tuple[int, int, int]]) -> Iterator[dict]:
+    """Yield cross-reference entries one at a time, resolving shared tag names lazily."""
+    for _, i, j in counts:
+        yield {"a": str(docs[i]["path"]), "b": str(docs[j]["path"]), "shared_tags": sorted(docs[i]["tags"] & docs[j]["tags"])}
+
+
+@profiled("collect_cross_references")
+def collect_cross_references(docs: list[dict], top_k: int = 0, min_shared: int = 1) -> list[dict]:
+    """Return cross-section document pairs and their shared tags as structured data."""
+    return list(iter_cross_references(docs, cross_reference_counts(docs, top_k, min_shared)))
+
+
+@profiled("insights")
+def generate_insights(
+    corpus: Corpus,
+    json_out: bool = False,
+    verbose: bool = False,
+    jobs: int = 1,
+    redundancy_threshold: float = REDUNDANCY_THRESHOLD,
+    redundancy_top: int = 0,
+    redundancy_method: str = "index",
+    top_k: int = 0,
+    min_shared: int = 1,
+    ndjson: bool = False,
+    state=None,
+) -> None:
     """Run modular insights analysis and print reporting.
 
     Args:
-        content_dir: Root content directory to scan.
+        corpus: Loaded content corpus to analyze.
         json_out: If True, emit a single JSON manifest instead of human-readable text.
         verbose: If True, show full cross-reference list in text mode.
+        jobs: Worker processes used to tokenize documents.
+        redundancy_threshold: Minimum Jaccard similarity for a tag pair to be redundant.
+        redundancy_top: Report at most this many redundant pairs (0 for all).
+        redundancy_method: Pair search used for redundancy ("index", "bitset" or "minhash").
+        top_k: Keep at most this many cross-references per document (0 for all).
+        min_shared: Minimum number of shared tags for a cross-reference.
+        ndjson: If True, emit one JSON record per line (stats, redundant_tag,
+            cross_reference and recommendation records) as they are computed.
+        state: Optional InsightsState; outputs are then refreshed from per-document
+            deltas against the previous run and the state is updated.
     """
-    import json as _json
-
-    docs, global_tags = collect_docs(content_dir)
+    docs, global_tags = collect_docs(corpus, jobs)
 
     if not docs:
         print("No markdown documents found.")
         return
 
+    # With persisted state the outputs are refreshed incrementally up front; otherwise each
+    # section is computed only when it is reached, so streamed output starts early
+    results = None
+    if state is not None:
+        results = state.refresh(docs, global_tags, redundancy_threshold, redundancy_top, redundancy_method, top_k, min_shared)
+
+    def redundancies() -> list[dict]:
+        if results is not None:
+            return results.redundancies
+        return collect_tag_cooccurrence(docs, redundancy_threshold, redundancy_top, redundancy_method)
+
+    def cross_counts() -> list[tuple[int, int, int]]:
+        return results.cross_counts if results is not None else cross_reference_counts(docs, top_k, min_shared)
+
+    def recommendations() -> Iterable[tuple[str, dict]]:
+        if results is not None:
+            return results.recommendations.items()
+        return profiled_iter("collect_tag_recommendations", iter_tag_recommendations(docs, global_tags))
+
+    if ndjson:
+
+        def records():
+            yield {"type": "stats", **collect_tag_distribution(docs)}
+            for r in redundancies():
+                yield {"type": "redundant_tag", **r}
+            for x in iter_cross_references(docs, cross_counts()):
+                yield {"type": "cross_reference", **x}
+            for path, recs in recommendations():
+                yield {"type": "recommendation", "path": path, **recs}
+
+        write_ndjson(records())
+        return
+
     if json_out:
-        manifest = {
-            "stats": collect_tag_distribution(docs),
-            "redundant_tags": collect_tag_cooccurrence(docs),
-            "cross_references": collect_cross_references(docs),
-            "recommendations": collect_tag_recommendations(docs, global_tags),
-        }
-        print(_json.dumps(manifest, indent=2))
+
+        def sections():
+            yield "stats", collect_tag_distribution(docs)
+            yield "redundant_tags", redundancies()
+            yield "cross_references", JsonArray(iter_cross_references(docs, cross_counts()))
+            yield "recommendations", JsonObject(recommendations())
+
+        write_json(JsonObject(sections()))
         return
 
     report_tag_distribution(docs)
-    report_tag_cooccurrence(docs)
-    report_cross_references(docs, verbose=verbose)
-    report_tag_recommendations(docs, global_tags)
+    report_tag_cooccurrence(docs, redundancy_threshold, redundancy_top, redundancy_method, redundancies=redundancies())
+    report_cross_references(docs, verbose=verbose, counts=cross_counts())
+    report_tag_recommendations(docs, global_tags, recommendations=dict(recommendations()))
@@ -0,0 +1,165 @@
+"""
+Bounded-memory, two-pass tag recommendations for corpora too large to hold in memory.
+"""
+
+import math
+import os
+import sqlite3
+import tempfile
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from .constants import MD_EXT
+from .corpus import Document
+from .insights import compound_tag_index, recommend_tags, section_of, tokenize_doc
+from .jsonstream import JsonObject, write_json, write_ndjson
+from .profiling import profiled
+from .utils import read_text
+
+# Approximate memory held per buffered DF entry (word, count, dict slot and the sorted flush list)
+DF_ENTRY_BYTES = 200
+
+# Share of the memory budget given to SQLite's page cache; the rest buffers DF increments
+DB_CACHE_SHARE = 0.25
+
+# Words looked up per query, well below SQLite's host-parameter limit
+LOOKUP_BATCH = 500
+
+
+def open_scratch(path: Path, max_bytes: int) -> sqlite3.Connection:
+    """Create the scratch database holding the DF table and the document list."""
+    db = sqlite3.connect(path)
+    db.execute(f"PRAGMA cache_size = -{max(1, int(max_bytes * DB_CACHE_SHARE) // 1024)}")
+    # Scratch data is rebuilt on every run, so durability is not worth paying for
+    db.execute("PRAGMA journal_mode = OFF")
+    db.execute("PRAGMA synchronous = OFF")
+    db.execute("CREATE TABLE df (word TEXT PRIMARY KEY, n INTEGER NOT NULL) WITHOUT ROWID")
+    db.execute("CREATE TABLE docs (section TEXT NOT NULL, path TEXT NOT NULL, PRIMARY KEY (section, path)) WITHOUT ROWID")
+    return db
+
+
+def iter_markdown(root: Path) -> Iterator[Path]:
+    """Yield the Markdown files insights analyzes, in directory-walk order without listing them all first."""
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if name.endswith(MD_EXT) and not name.startswith(".") and name != "_index.md":
+                p = Path(dirpath) / name
+                if p.is_file():
+                    yield p
+
+
+def flush_df(db: sqlite3.Connection, buffer: Counter) -> None:
+    """Add buffered DF increments to the on-disk table, in key order for B-tree locality."""
+    db.executemany("INSERT INTO df VALUES (?, ?) ON CONFLICT(word) DO UPDATE SET n = n + excluded.n", sorted(buffer.items()))
+    buffer.clear()
+
+
+def lookup_df(db: sqlite3.Connection, words: Iterable[str]) -> Counter:
+    """Return the document frequencies of the given words."""
+    words = list(words)
+    df = Counter()
+    for start in range(0, len(words), LOOKUP_BATCH):
+        batch = words[start : start + LOOKUP_BATCH]
+        df.update(dict(db.execute(f"SELECT word, n FROM df WHERE word IN ({','.join('?' * len(batch))})", batch)))
+    return df
+
+
+def read_doc(root: Path, p: Path) -> dict:
+    """Read, tokenize and summarize one document; nothing of it is kept once the caller is done."""
+    doc = Document(p, read_text(p))
+    # Not interned like doc_word_counts: interned strings are never freed, so the vocabulary would pile up
+    word_counts = tokenize_doc(doc)
+    return {
+        "path": p.relative_to(root),
+        "tags": set(doc.tags if doc.fm_lines is not None else []),
+        "length": sum(word_counts.values()),
+        "word_counts": word_counts,
+    }
+
+
+@profiled("insights_df_pass")
+def df_pass(db: sqlite3.Connection, root: Path, max_bytes: int) -> tuple[int, set[str]]:
+    """First pass: stream every document once, accumulating DF on disk and the global tag set.
+
+    Returns the number of documents and the tag set (bounded by the taxonomy, not the corpus).
+    """
+    limit = max(1, int(max_bytes * (1 - DB_CACHE_SHARE)) // DF_ENTRY_BYTES)
+    buffer = Counter()
+    global_tags = set()
+    total_docs = 0
+    for p in iter_markdown(root):
+        try:
+            d = read_doc(root, p)
+        except OSError:
+            continue
+        total_docs += 1
+        global_tags |= d["tags"]
+        path = str(d["path"])
+        db.execute("INSERT INTO docs VALUES (?, ?)", (section_of(path), path))
+        buffer.update(d["word_counts"].keys())
+        if len(buffer) >= limit:
+            flush_df(db, buffer)
+    flush_df(db, buffer)
+    return total_docs, global_tags
+
+
+def iter_bounded_recommendations(db: sqlite3.Connection, root: Path, total_docs: int, global_tags: set[str]) -> Iterator[tuple[str, dict]]:
+    """Second pass: re-read documents one at a time, by section then path, and yield their recommendations."""
+    compound_tags = compound_tag_index(global_tags, lookup_df(db, {p for t in global_tags for p in t.split("-")}))
+    # A second cursor, so the document list streams from disk while DF lookups run
+    for (path,) in db.cursor().execute("SELECT path FROM docs ORDER BY section, path"):
+        try:
+            d = read_doc(root, root / path)
+        except OSError:
+            continue
+        df = lookup_df(db, d["word_counts"])
+        idf = {w: math.log(total_docs / (1 + n)) for w, n in df.items()}
+        recs = recommend_tags(d, idf, df, global_tags, compound_tags)
+        if recs is not None:
+            yield path, recs
+
+
+@profiled("insights_bounded")
+def generate_bounded_insights(root: Path, scratch_dir: Path, max_memory_mb: int, json_out: bool = False, ndjson: bool = False) -> None:
+    """Report TF-IDF tag recommendations in two streaming passes with memory bounded by max_memory_mb.
+
+    Document frequencies live in a scratch SQLite table under scratch_dir, so peak
+    memory depends on the budget and the largest single document rather than on
+    corpus size. Only recommendations are reported: redundancy and cross-reference
+    analysis need the whole doc-tag incidence. Text output matches the
+    recommendations section of the full report; JSON and NDJSON list documents in
+    the same section-then-path order.
+    """
+    max_bytes = max_memory_mb * 1024 * 1024
+    scratch_dir.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=scratch_dir, prefix=".insights-") as tmp:
+        db = open_scratch(Path(tmp) / "df.sqlite", max_bytes)
+        try:
+            total_docs, global_tags = df_pass(db, root, max_bytes)
+            if not total_docs:
+                print("No markdown documents found.")
+                return
+            recommendations = iter_bounded_recommendations(db, root, total_docs, global_tags)
+
+            if ndjson:
+                write_ndjson({"type": "recommendation", "path": path, **recs} for path, recs in recommendations)
+                return
+
+            if json_out:
+                write_json(JsonObject([("recommendations", JsonObject(recommendations))]))
+                return
+
+            print(f"Stats: {total_docs} docs, {len(global_tags)} unique tags")
+            current = None
+            for path, recs in recommendations:
+                if current is None:
+                    print("\nRecommendations (Found [Existing] or New Candidates):")
+                section = section_of(path)
+                if section != current:
+                    print(f"  [{section.upper()}]")
+                    current = section
+                res_list = [f"[{t}]" for t in recs["established"]] + recs["new_candidates"]
+                print(f"    {path}: {', '.join(res_list)}")
+        finally:
+            db.close()
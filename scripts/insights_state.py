@@ -0,0 +1,243 @@
+"""
+Persisted intermediate insights state, updated by per-document deltas between runs.
+"""
+
+import heapq
+import math
+from array import array
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from .cache import load_marshal, save_marshal
+from .insights import (
+    collect_tag_cooccurrence,
+    compound_tag_index,
+    cross_reference_counts,
+    recommend_tags,
+    section_of,
+)
+from .profiling import profiled
+
+# Bump whenever the layout of the persisted state changes
+STATE_VERSION = 1
+
+
+class InsightsResults:
+    """Analysis outputs handed to the insights reporters."""
+
+    __slots__ = ("cross_counts", "recommendations", "redundancies")
+
+    def __init__(self, redundancies: list[dict], cross_counts: list[tuple[int, int, int]], recommendations: dict[str, dict]):
+        self.redundancies = redundancies
+        self.cross_counts = cross_counts
+        self.recommendations = recommendations
+
+
+class InsightsState:
+    """The DF table, doc-tag incidence, term vectors and last outputs of the insights stage.
+
+    refresh() diffs the current documents against the stored ones and only redoes
+    work the delta affects: DF entries are adjusted for added, changed and removed
+    documents; recommendations are recomputed for documents whose words or tags
+    changed or that contain a word whose DF moved (all of them if the corpus size or
+    tag set changed); co-occurrence and cross-references are reused unless tags
+    changed, and cross-references are then patched row by row.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.data: dict | None = None
+        self.dirty = False
+        self._load()
+
+    @profiled("insights_state_load")
+    def _load(self) -> None:
+        self.data = load_marshal(self.path, STATE_VERSION)
+
+    @profiled("insights_state_refresh")
+    def refresh(
+        self,
+        docs: list[dict],
+        global_tags: set[str],
+        redundancy_threshold: float,
+        redundancy_top: int,
+        redundancy_method: str,
+        top_k: int,
+        min_shared: int,
+    ) -> InsightsResults:
+        """Bring the state up to date with docs and return the analysis outputs."""
+        paths = [str(d["path"]) for d in docs]
+        vectors = [d["word_counts"] for d in docs]
+        tags = [sorted(d["tags"]) for d in docs]
+        old = self.data
+        if old is None:
+            old = {"paths": [], "vectors": [], "tags": [], "df": {}, "global_tags": [], "recommendations": {}, "redundancy": None, "cross": None}
+        old_index = {p: i for i, p in enumerate(old["paths"])}
+
+        # Classify documents against the stored state
+        word_changed: list[int] = []
+        tag_changed: list[int] = []
+        for i, p in enumerate(paths):
+            j = old_index.get(p)
+            # Key order matters too: it breaks ties between equally scored words
+            if j is None or old["vectors"][j] != vectors[i] or list(old["vectors"][j]) != list(vectors[i]):
+                word_changed.append(i)
+            if j is None or old["tags"][j] != tags[i]:
+                tag_changed.append(i)
+        current = set(paths)
+        removed = [j for j, p in enumerate(old["paths"]) if p not in current]
+        if (
+            not (word_changed or tag_changed or removed)
+            and paths == old["paths"]
+            and self._options_match(old, redundancy_threshold, redundancy_top, redundancy_method, top_k, min_shared)
+        ):
+            return self._results(old)
+
+        # Apply DF deltas from the old and new term vectors of every touched document
+        df = Counter(old["df"])
+        moved: set[str] = set()
+        stale = removed + [old_index[paths[i]] for i in word_changed if paths[i] in old_index]
+        for j in stale:
+            for w in old["vectors"][j]:
+                moved.add(w)
+                df[w] -= 1
+                if not df[w]:
+                    del df[w]
+        for i in word_changed:
+            for w in vectors[i]:
+                moved.add(w)
+                df[w] += 1
+
+        recommendations = self._refresh_recommendations(old, docs, paths, global_tags, df, moved, set(word_changed) | set(tag_changed))
+
+        incidence_same = not tag_changed and not removed and paths == old["paths"]
+        redundancy_opts = [redundancy_threshold, redundancy_top, redundancy_method]
+        if incidence_same and old["redundancy"] is not None and old["redundancy"][0] == redundancy_opts:
+            redundancies = old["redundancy"][1]
+        else:
+            redundancies = collect_tag_cooccurrence(docs, redundancy_threshold, redundancy_top, redundancy_method)
+
+        cross_opts = [top_k, min_shared]
+        if incidence_same and old["cross"] is not None and old["cross"][0] == cross_opts:
+            cross_counts = unpack_counts(old["cross"][1])
+        elif top_k == 0 and old["cross"] is not None and old["cross"][0] == cross_opts:
+            cross_counts = patch_cross_counts(docs, paths, old, unpack_counts(old["cross"][1]), tag_changed, min_shared)
+        else:
+            cross_counts = cross_reference_counts(docs, top_k, min_shared)
+
+        self.data = {
+            "version": STATE_VERSION,
+            "paths": paths,
+            "vectors": vectors,
+            "tags": tags,
+            "df": dict(df),
+            "global_tags": sorted(global_tags),
+            "recommendations": recommendations,
+            "redundancy": [redundancy_opts, redundancies],
+            "cross": [cross_opts, pack_counts(cross_counts)],
+        }
+        self.dirty = True
+        return InsightsResults(redundancies, cross_counts, recommendations)
+
+    @staticmethod
+    def _options_match(old: dict, threshold: float, top: int, method: str, top_k: int, min_shared: int) -> bool:
+        return (
+            old["redundancy"] is not None
+            and old["redundancy"][0] == [threshold, top, method]
+            and old["cross"] is not None
+            and old["cross"][0] == [top_k, min_shared]
+        )
+
+    @staticmethod
+    def _results(old: dict) -> InsightsResults:
+        return InsightsResults(old["redundancy"][1], unpack_counts(old["cross"][1]), old["recommendations"])
+
+    @staticmethod
+    def _refresh_recommendations(
+        old: dict, docs: list[dict], paths: list[str], global_tags: set[str], df: Counter, moved: set[str], touched: set[int]
+    ) -> dict[str, dict]:
+        """Recompute recommendations only for documents whose inputs changed."""
+        # IDF depends on the corpus size and established matches on the tag set; either change touches everything
+        everything = len(paths) != len(old["paths"]) or sorted(global_tags) != old["global_tags"]
+        total_docs = len(docs)
+        idf = {w: math.log(total_docs / (1 + n)) for w, n in df.items()}
+        compound_tags = compound_tag_index(global_tags, df)
+        previous = old["recommendations"]
+
+        recommendations = {}
+        for i, d in enumerate(docs):
+            if everything or i in touched or not moved.isdisjoint(d["word_counts"]):
+                recs = recommend_tags(d, idf, df, global_tags, compound_tags)
+            else:
+                recs = previous.get(paths[i])
+            if recs is not None:
+                recommendations[paths[i]] = recs
+        return recommendations
+
+    @profiled("insights_state_save")
+    def save(self) -> None:
+        """Persist the state if refresh() changed it."""
+        if not self.dirty:
+            return
+        save_marshal(self.path, self.data)
+        self.dirty = False
+
+
+def pack_counts(counts: list[tuple[int, int, int]]) -> bytes:
+    """Flatten ``(shared, i, j)`` cross-reference triples into a compact byte string."""
+    flat = array("l")
+    for triple in counts:
+        flat.extend(triple)
+    return flat.tobytes()
+
+
+def unpack_counts(raw: bytes) -> list[tuple[int, int, int]]:
+    """Inverse of pack_counts."""
+    flat = array("l")
+    flat.frombytes(raw)
+    it = iter(flat)
+    return list(zip(it, it, it))
+
+
+def patch_cross_counts(
+    docs: list[dict], paths: list[str], old: dict, counts: list[tuple[int, int, int]], tag_changed: list[int], min_shared: int
+) -> list[tuple[int, int, int]]:
+    """Update stored cross-reference counts for documents whose tags changed (no per-document limit).
+
+    Pairs between untouched documents keep their counts; rows are recomputed for
+    touched documents and merged back into the (shared desc, path asc) order.
+    """
+    old_paths = old["paths"]
+    index = {p: i for i, p in enumerate(paths)}
+    touched = {paths[i] for i in tag_changed} | {p for p in old_paths if p not in index}
+    order = sorted(range(len(paths)), key=paths.__getitem__)
+    rank = [0] * len(paths)
+    for r, i in enumerate(order):
+        rank[i] = r
+
+    kept = []
+    for n, a, b in counts:
+        pa, pb = old_paths[a], old_paths[b]
+        if pa not in touched and pb not in touched:
+            kept.append((n, index[pa], index[pb]))
+
+    sections = [section_of(p) for p in paths]
+    postings: dict[str, list[int]] = defaultdict(list)
+    for i, d in enumerate(docs):
+        for t in d["tags"]:
+            postings[t].append(i)
+    fresh = set()
+    for i in tag_changed:
+        row: dict[int, int] = defaultdict(int)
+        for t in docs[i]["tags"]:
+            for j in postings[t]:
+                if sections[j] != sections[i]:
+                    row[j] += 1
+        for j, n in row.items():
+            if n >= min_shared:
+                fresh.add((n, i, j) if rank[i] < rank[j] else (n, j, i))
+
+    def key(e):
+        return -e[0], rank[e[1]], rank[e[2]]
+
+    return list(heapq.merge(kept, sorted(fresh, key=key), key=key))
@@ -0,0 +1,101 @@
+"""
+Incremental JSON and NDJSON writers for large Systology reports.
+"""
+
+import json
+import sys
+from collections.abc import Iterable
+from typing import Any, TextIO
+
+# Plain members serialized per json.dumps call when streaming a container
+STREAM_BATCH = 1024
+
+
+class JsonArray:
+    """An array whose items are produced lazily and written one at a time."""
+
+    __slots__ = ("items",)
+
+    def __init__(self, items: Iterable[Any]):
+        self.items = items
+
+
+class JsonObject:
+    """An object whose (key, value) members are produced lazily and written one at a time."""
+
+    __slots__ = ("pairs",)
+
+    def __init__(self, pairs: Iterable[tuple[str, Any]]):
+        self.pairs = pairs
+
+
+def _dump(value: Any, level: int, indent: int, sort_keys: bool) -> str:
+    """Serialize a plain value as json.dumps would when nested ``level`` deep."""
+    text = json.dumps(value, indent=indent, sort_keys=sort_keys)
+    return text.replace("\n", "\n" + " " * (indent * level)) if level else text
+
+
+def _dump_members(batch: list[tuple[str | None, Any]], level: int, indent: int, sort_keys: bool) -> str:
+    """Serialize plain container members as the indented lines json.dumps puts between the brackets."""
+    if batch[0][0] is None:
+        text = _dump([item for _, item in batch], level, indent, sort_keys)
+    else:
+        text = _dump(dict(batch), level, indent, sort_keys)
+    # Strip the opening bracket line and the closing bracket line
+    return text[2 : -(2 + indent * level)]
+
+
+def write_json(value: Any, out: TextIO | None = None, indent: int = 2, sort_keys: bool = False, level: int = 0) -> None:
+    """Write value as indented JSON, streaming JsonArray/JsonObject members as they are produced.
+
+    The output is byte-for-byte what ``json.dumps(value, indent=indent)`` gives for the
+    equivalent fully built value. Plain members are serialized in batches of
+    STREAM_BATCH, so memory stays bounded however many members are streamed.
+    JsonObject members keep their produced order even with ``sort_keys``. Output goes
+    to out, or to whatever sys.stdout is at call time.
+    """
+    out = sys.stdout if out is None else out
+    if isinstance(value, JsonArray):
+        members = ((None, item) for item in value.items)
+        brackets = "[]"
+    elif isinstance(value, JsonObject):
+        members = value.pairs
+        brackets = "{}"
+    else:
+        members = None
+        out.write(_dump(value, level, indent, sort_keys))
+
+    if members is not None:
+        pad = " " * (indent * (level + 1))
+        first = True
+        batch: list[tuple[str | None, Any]] = []
+
+        def flush() -> None:
+            nonlocal first
+            if batch:
+                out.write(brackets[0] + "\n" if first else ",\n")
+                out.write(_dump_members(batch, level, indent, sort_keys))
+                first = False
+                batch.clear()
+
+        for key, item in members:
+            if isinstance(item, (JsonArray, JsonObject)):
+                flush()
+                out.write(brackets[0] + "\n" if first else ",\n")
+                first = False
+                out.write(pad if key is None else f"{pad}{json.dumps(key)}: ")
+                write_json(item, out, indent, sort_keys, level + 1)
+            else:
+                batch.append((key, item))
+                if len(batch) >= STREAM_BATCH:
+                    flush()
+        flush()
+        out.write(brackets if first else "\n" + " " * (indent * level) + brackets[1])
+    if level == 0:
+        out.write("\n")
+
+
+def write_ndjson(records: Iterable[dict], out: TextIO | None = None) -> None:
+    """Write one compact JSON object per line to out (default: the current sys.stdout)."""
+    out = sys.stdout if out is None else out
+    out.writelines(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
@@ -0,0 +1,245 @@
+"""
+Prebuilt index of link targets (content paths, permalinks, static files, heading anchors) for validation.
+"""
+
+import os
+import posixpath
+import re
+from collections import Counter
+from pathlib import Path
+
+from .constants import MD_EXT
+from .corpus import Corpus, Document
+from .profiling import profiled
+from .scanner import doc_outline
+
+# Inline links in heading text, which contribute only their text to the heading's ID
+LINK_RE = re.compile(r"\[([^\]]+)\]\(([^)]+)\)")
+# Explicit heading ID, e.g. ## Setup {#install}
+HEADING_ID_RE = re.compile(r"\s*\{#([^}\s]+)\}$")
+# Target of a ref/relref shortcode, e.g. {{< ref "/principles/monitoring" >}}
+REF_ARG_RE = re.compile(r'"([^"]+)"')
+REF_SHORTCODES = ("ref", "relref")
+
+# Link targets that are never resolved against the site
+EXTERNAL_PREFIXES = ("http", "mailto:", "tel:")
+
+# Page files Hugo serves for a directory URL (section list page, then leaf bundle)
+INDEX_PAGES = ("_index.md", "index.md")
+
+
+def heading_slug(text: str) -> str:
+    """Return the anchor Hugo's default GitHub-style heading IDs give a heading's text."""
+    text = LINK_RE.sub(r"\1", text).strip().lower()
+    return "".join(c if c.isalnum() or c in "-_" else "-" if c == " " else "" for c in text)
+
+
+def page_anchors(doc: Document) -> list[str]:
+    """Return the fragment IDs a page defines, memoized so the parse cache can persist them.
+
+    Headings outside code fences get Hugo's automatic IDs (repeats suffixed -1, -2, ...)
+    unless they carry an explicit ``{#id}``; raw HTML elements contribute their id attributes.
+    """
+    anchors = doc.memo.get("anchors")
+    if anchors is not None:
+        return anchors
+
+    anchors = []
+    seen: Counter = Counter()
+    outline = doc_outline(doc)
+    for _, title, _ in outline["headings"]:
+        explicit = HEADING_ID_RE.search(title)
+        if explicit:
+            anchors.append(explicit.group(1))
+            continue
+        slug = heading_slug(title)
+        anchors.append(f"{slug}-{seen[slug]}" if seen[slug] else slug)
+        seen[slug] += 1
+    anchors.extend(outline["ids"])
+    doc.memo["anchors"] = anchors
+    return anchors
+
+
+def page_links(doc: Document) -> tuple[list[tuple[str, int, int]], list[tuple[str, int, int]]]:
+    """Return a page's internal Markdown link targets and ref shortcode targets, with line and column."""
+    outline = doc_outline(doc)
+    links = [link for link in outline["links"] if link[0] and not link[0].startswith(EXTERNAL_PREFIXES)]
+    refs = []
+    for name, args, line, col in outline["shortcodes"]:
+        target = REF_ARG_RE.match(args) if name in REF_SHORTCODES else None
+        if target:
+            refs.append((target.group(1), line, col))
+    return links, refs
+
+
+def with_md_suffix(rel: str) -> str | None:
+    """Return rel with its extension replaced by (or extended with) .md, as PurePosixPath.with_suffix would."""
+    head, name = posixpath.split(rel)
+    if not name or name in (".", ".."):
+        return None
+    dot = name.rfind(".")
+    stem = name[:dot] if 0 < dot < len(name) - 1 else name
+    return posixpath.join(head, stem + MD_EXT)
+
+
+def walk_paths(root: Path) -> set[str]:
+    """Return the root-relative POSIX paths of every file and directory under root ("." for root itself)."""
+    paths = set()
+    if root.is_dir():
+        for dirpath, dirnames, filenames in os.walk(root):
+            rel = Path(dirpath).relative_to(root).as_posix()
+            paths.add(rel)
+            prefix = "" if rel == "." else f"{rel}/"
+            paths.update(prefix + name for name in dirnames)
+            paths.update(prefix + name for name in filenames)
+    return paths
+
+
+class LinkIndex:
+    """Everything an internal link can point at, collected once so resolving a link costs no stat calls.
+
+    ``paths`` and ``static`` hold every file and directory under the content and
+    static roots; ``permalinks`` maps URL paths set through ``url``/``slug``
+    frontmatter to pages; ``anchors`` holds each page's fragment IDs and
+    ``inbound`` the number of other pages linking to each page.
+    """
+
+    __slots__ = ("anchors", "content_root", "inbound", "paths", "permalinks", "root_prefix", "static", "static_root")
+
+    def __init__(self, content_root: Path, static_root: Path):
+        self.content_root = content_root
+        self.root_prefix = content_root.as_posix().rstrip("/") + "/"
+        self.static_root = static_root
+        self.paths: set[str] = set()
+        self.static: set[str] = set()
+        self.permalinks: dict[str, str] = {}
+        self.anchors: dict[str, set[str]] = {}
+        self.inbound: Counter = Counter()
+
+    @classmethod
+    @profiled("link_index")
+    def build(cls, corpus: Corpus, static_root: Path) -> "LinkIndex":
+        """Index every path under the content and static roots and every page of the (full) corpus."""
+        index = cls(corpus.root, static_root)
+        index.paths = walk_paths(corpus.root)
+        index.static = walk_paths(static_root)
+        for doc in corpus:
+            index.add_page(doc)
+        for doc in corpus:
+            source = index.rel(doc.path)
+            links, refs = page_links(doc)
+            pages = [index.link_page(link, source) for link, _, _ in links] + [index.link_page(ref, source, ref=True) for ref, _, _ in refs]
+            index.inbound.update(page for page in pages if page is not None and page != source)
+        return index
+
+    def rel(self, path: Path) -> str:
+        """Return a content file's path relative to the content root, POSIX-style."""
+        posix = path.as_posix()
+        if posix.startswith(self.root_prefix):
+            return posix[len(self.root_prefix) :]
+        return path.relative_to(self.content_root).as_posix()
+
+    def add_page(self, doc: Document) -> None:
+        """Add or refresh a page's path, permalink and anchors."""
+        rel = self.rel(doc.path)
+        self.paths.add(rel)
+        parent = posixpath.dirname(rel)
+        # Also register the directories of pages created since the tree was walked
+        d = parent
+        while d:
+            self.paths.add(d)
+            d = posixpath.dirname(d)
+        self.paths.add(".")
+        if doc.fm_lines is not None:
+            url = doc.fm.get("url", "").strip("/")
+            slug = doc.fm.get("slug", "").strip("/")
+            if url:
+                self.permalinks[url] = rel
+            elif slug:
+                self.permalinks[posixpath.join(parent, slug)] = rel
+        self.anchors[rel] = set(page_anchors(doc))
+
+    def remove_page(self, path: Path) -> None:
+        """Forget a deleted page."""
+        rel = self.rel(path)
+        self.paths.discard(rel)
+        self.anchors.pop(rel, None)
+        for url in [u for u, page in self.permalinks.items() if page == rel]:
+            del self.permalinks[url]
+
+    def resolve(self, target: str, source: str, ref: bool = False) -> str | None:
+        """Return the content-relative path a link target (without fragment) points at, or None if nothing matches.
+
+        Absolute targets are tried against the content root, permalinks and static
+        files; relative ones against the linking page's directory, and for ref
+        shortcodes then against the content root, as Hugo does. Either may omit the
+        ``.md`` extension, as with Hugo's ``/section/page/`` URLs.
+        """
+        if ref and not target.startswith("/"):
+            return self.resolve(target, source) or self.resolve(f"/{target}", source)
+        if target.startswith("/"):
+            rel = posixpath.normpath(target.lstrip("/") or ".")
+        else:
+            rel = posixpath.normpath(posixpath.join(posixpath.dirname(source), target))
+        if rel == ".." or rel.startswith("../"):
+            # Outside the content tree: the index cannot answer, so ask the filesystem
+            return rel if (self.content_root / rel).exists() else None
+        if rel in self.paths:
+            return rel
+        md = with_md_suffix(rel)
+        if md in self.paths:
+            return md
+        page = self.permalinks.get(rel)
+        if page is not None:
+            return page
+        if target.startswith("/") and rel in self.static:
+            return rel
+        return None
+
+    def page_of(self, rel: str) -> str | None:
+        """Return the page a resolved path renders as (a directory maps to its index page), if any."""
+        if rel in self.anchors:
+            return rel
+        for name in INDEX_PAGES:
+            page = name if rel == "." else f"{rel}/{name}"
+            if page in self.anchors:
+                return page
+        return None
+
+    def link_page(self, link: str, source: str, ref: bool = False) -> str | None:
+        """Return the page a link points at, or None for broken links and non-page targets."""
+        target = link.partition("#")[0]
+        if not target:
+            return source
+        rel = self.resolve(target, source, ref)
+        return None if rel is None else self.page_of(rel)
+
+    def check_link(self, link: str, source: str, ref: bool = False) -> str | None:
+        """Return an error for a link that does not resolve, or whose fragment the target page does not define."""
+        target, _, fragment = link.partition("#")
+        if target:
+            rel = self.resolve(target, source, ref)
+            if rel is None:
+                return f"Broken {'ref' if ref else 'link'}: {link}"
+            page = self.page_of(rel)
+        else:
+            page = source
+        if fragment and page is not None and fragment not in self.anchors[page]:
+            return f"Broken anchor: {link}"
+        return None
+
+    def image_file(self, src: str, source: str) -> Path | None:
+        """Return the file an image source refers to (absolute sources under static/, relative ones beside the page), if it exists."""
+        if src.startswith("/"):
+            rel = posixpath.normpath(src.lstrip("/") or ".")
+            paths, root = self.static, self.static_root
+        else:
+            rel = posixpath.normpath(posixpath.join(posixpath.dirname(source), src))
+            paths, root = self.paths, self.content_root
+        if rel == ".." or rel.startswith("../"):
+            return root / rel if (root / rel).exists() else None
+        return root / rel if rel in paths else None
+
+    def orphans(self, docs: list[Document]) -> list[str]:
+        """Return the pages among docs that no other page links to (section and home pages excluded)."""
+        return sorted(rel for rel in (self.rel(doc.path) for doc in docs) if posixpath.basename(rel) != "_index.md" and not self.inbound[rel])
@@ -2,106 +2,48 @@
 Logic for managing Systology site metadata (tags, etc.).
 """
 
-import json
-import os
-import re
 from collections import Counter, defaultdict
-from pathlib import Path
 
-from .constants import FM_DELIM, FM_TAGS, MD_EXT, TAG_ALIASES, TAG_REMOVALS
-from .utils import strip_quotes
+from .constants import FM_DELIM, FM_TAGS, TAG_ALIASES, TAG_REMOVALS
+from .corpus import Corpus
+from .frontmatter import INLINE_LIST, parse_frontmatter, replace_field
+from .jsonstream import JsonObject, write_json, write_ndjson
+from .profiling import profiled
 
 
-def run_sort_tags(content_dir: Path) -> None:
-    """Alphabetically sort tags within the frontmatter of all Markdown files."""
-    print("Running sort_tags...")
-    count = 0
-    for p in content_dir.rglob(f"*{MD_EXT}"):
-        content = p.read_text(encoding="utf-8")
-        # simplistic toggle for block vs inline
-        # inline: tags: [a, b]
-        m = re.search(r"^\s*" + FM_TAGS + r"\s*:\s*\[([^\]]*)\]", content, re.MULTILINE)
-        if m:
-            tags_str = m.group(1)
-            tags = [t.strip() for t in tags_str.split(",") if t.strip()]
-            sorted_tags = sorted(set(tags))
-            if tags != sorted_tags:
-                new_tags_str = ", ".join(sorted_tags)
-                new_content = content.replace(f"[{tags_str}]", f"[{new_tags_str}]")
-                p.write_text(new_content, encoding="utf-8")
-                count += 1
-    print(f"  Sorted tags in {count} files")
-
-
-def parse_tags_from_text(text: str) -> list[str]:
-    """Extract a list of tags from frontmatter in a Markdown text block."""
-    lines = text.splitlines()
-    if not lines or lines[0].strip() != FM_DELIM:
-        return []
-
-    end_idx = None
-    for i in range(1, len(lines)):
-        if lines[i].strip() == FM_DELIM:
-            end_idx = i
-            break
-    if end_idx is None:
-        return []
-
-    fm_text = "\n".join(lines[1:end_idx])
-
-    # Inline list
-    m = re.search(r"^\s*" + FM_TAGS + r"\s*:\s*\[([^\]]*)\]", fm_text, re.MULTILINE)
-    if m:
-        return [strip_quotes(p) for p in m.group(1).split(",") if p.strip()]
-
-    # Single scalar
-    m = re.search(
-        r"^\s*" + FM_TAGS + r"\s*:\s*([\'\"]?[^\n\'\"]+[\'\"]?)\s*$",
-        fm_text,
-        re.MULTILINE,
-    )
-    if m:
-        return [strip_quotes(m.group(1))]
-
-    # Block list
-    block_start = None
-    lines_fm = fm_text.splitlines()
-    for idx, line in enumerate(lines_fm):
-        if re.match(r"^\s*" + FM_TAGS + r"\s*:\s*$", line):
-            block_start = idx
-            break
-    if block_start is not None:
-        tags = []
-        for line in lines_fm[block_start + 1 :]:
-            if re.match(r"^\s*-\s+(.+)", line):
-                tags.append(strip_quotes(re.sub(r"^\s*-\s+", "", line).strip()))
-            elif line.strip() and not line[0].isspace():
-                break
-        return tags
-    return []
-
-
-def run_tag_stats(content_dir: Path, min_count: int, top: int, json_out: bool, show_files: bool) -> None:
+def sort_tags_in_text(text: str) -> str:
+    """Alphabetically sort the inline tag list within the frontmatter of a Markdown text."""
+    field = parse_frontmatter(text).fields.get(FM_TAGS)
+    if field is None or field.kind != INLINE_LIST:
+        return text
+    sorted_tags = sorted(set(field.items))
+    if field.items == sorted_tags:
+        return text
+    return replace_field(text, field, f"{FM_TAGS}: [{', '.join(sorted_tags)}]")
+
+
+@profiled("tag_stats")
+def run_tag_stats(corpus: Corpus, min_count: int, top: int, json_out: bool, show_files: bool, ndjson: bool = False) -> None:
     """Calculate and display usage statistics for tags across all Markdown content."""
     counter = Counter()
     files_for_tag = defaultdict(list)
 
-    for md in content_dir.rglob(f"*{MD_EXT}"):
-        try:
-            text = md.read_text(encoding="utf-8")
-        except OSError:
-            continue
-        for t in parse_tags_from_text(text):
+    for doc in corpus:
+        for t in doc.tags:
             counter[t] += 1
-            files_for_tag[t].append(str(md))
+            files_for_tag[t].append(str(doc.path))
 
     items = [(tag, cnt) for tag, cnt in counter.items() if cnt >= min_count]
     items.sort(key=lambda x: (-x[1], x[0]))
     if top > 0:
         items = items[:top]
 
+    if ndjson:
+        write_ndjson({"tag": tag, "count": cnt} for tag, cnt in items)
+        return
+
     if json_out:
-        print(json.dumps({tag: cnt for tag, cnt in items}, indent=2, sort_keys=True))
+        write_json(JsonObject(sorted(items)))
         return
 
     if not items:
@@ -123,40 +65,44 @@ def run_tag_stats(content_dir: Path, min_count: int, top: int, json_out: bool, s
 
 
 def tagup_in_text(text: str, aliases: dict, removals: list) -> str:
-    """Apply tag aliases and removals to frontmatter tags within a text string."""
-
-    # Logic for tag replacement in frontmatter
-    # This is a bit complex in manage.py, simplified here for modularity
-    # Standard approach is to parse, modify, then dump.
-    # But current manage.py seems to do it with regex to preserve comments/formatting.
-    def replace_tag(match):
-        tags_str = match.group(1)
-        tags = [t.strip() for t in tags_str.split(",") if t.strip()]
-        new_tags = []
-        for t in tags:
-            clean_t = strip_quotes(t).lower()
-            if clean_t in removals:
-                continue
-            new_t = aliases.get(clean_t, clean_t)
-            new_tags.append(new_t)
-        # Unique and sorted
-        final_tags = sorted(set(new_tags))
-        return f"tags: [{', '.join(final_tags)}]"
-
-    return re.sub(r"tags\s*:\s*\[([^\]]*)\]", replace_tag, text)
-
-
-def run_tagup(content_dir: Path) -> None:
-    """Apply site-wide tag aliases and removals across all Markdown files."""
+    """Apply tag aliases and removals to the inline frontmatter tag list of a text string.
+
+    Only the ``tags`` field located by the frontmatter tokenizer is rewritten, so
+    ``tags: [...]`` examples in the body are left alone.
+    """
+    field = parse_frontmatter(text).fields.get(FM_TAGS)
+    if field is None or field.kind != INLINE_LIST:
+        return text
+    new_tags = []
+    for t in field.items:
+        clean_t = t.lower()
+        if clean_t in removals:
+            continue
+        new_tags.append(aliases.get(clean_t, clean_t))
+    # Unique and sorted
+    final_tags = sorted(set(new_tags))
+    return replace_field(text, field, f"{FM_TAGS}: [{', '.join(final_tags)}]")
+
+
+def tagup_site(text: str) -> str:
+    """Apply the site-wide TAG_ALIASES and TAG_REMOVALS to a Markdown text."""
+    return tagup_in_text(text, TAG_ALIASES, TAG_REMOVALS)
+
+
+@profiled("tagup")
+def run_tagup(corpus: Corpus) -> None:
+    """Apply site-wide tag aliases and removals across all Markdown documents."""
     print("Running tagup...")
     count = 0
-    for root, _, files in os.walk(content_dir):
-        for file in files:
-            if file.endswith(MD_EXT):
-                path = Path(root) / file
-                content = path.read_text(encoding="utf-8")
-                new_content = tagup_in_text(content, TAG_ALIASES, TAG_REMOVALS)
-                if new_content != content:
-                    path.write_text(new_content, encoding="utf-8")
-                    count += 1
+    for doc in corpus:
+        if doc.fm_lines is None:
+            continue
+        # Decide from the header alone so unchanged files never have their bodies read
+        header = "\n".join([FM_DELIM, *doc.fm_lines, FM_DELIM, ""])
+        if tagup_site(header) == header:
+            continue
+        new_content = tagup_site(doc.text)
+        if new_content != doc.text:
+            doc.write(new_content)
+            count += 1
     print(f"  Applied tags update in {count} files")
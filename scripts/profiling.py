@@ -0,0 +1,160 @@
+"""
+Lightweight per-stage profiling for the Systology management scripts.
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+
+
+class StageStats:
+    """Accumulated measurements for one named stage across all of its calls."""
+
+    __slots__ = ("bytes_read", "bytes_written", "calls", "cpu", "depth", "files_read", "files_written", "name", "peak_mem", "wall")
+
+    def __init__(self, name: str, depth: int):
+        self.name = name
+        self.depth = depth
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.files_read = 0
+        self.files_written = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.peak_mem = 0
+
+
+class Profiler:
+    """Records wall/CPU time, file I/O and peak traced memory per stage.
+
+    Disabled by default, in which case every hook is a cheap no-op. I/O is
+    attributed to the innermost active stage; reads and writes performed in
+    worker processes (--jobs) are not counted.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.stages: dict[str, StageStats] = {}
+        self.stack: list[StageStats] = []
+        self.spans: list[dict] = []
+        self.origin = 0.0
+
+    def enable(self) -> None:
+        self.enabled = True
+        self.origin = time.perf_counter()
+        tracemalloc.start()
+
+    def record_read(self, nbytes: int) -> None:
+        if self.enabled and self.stack:
+            self.stack[-1].files_read += 1
+            self.stack[-1].bytes_read += nbytes
+
+    def record_write(self, nbytes: int) -> None:
+        if self.enabled and self.stack:
+            self.stack[-1].files_written += 1
+            self.stack[-1].bytes_written += nbytes
+
+    @contextmanager
+    def stage(self, name: str):
+        """Measure the enclosed block as (part of) the named stage."""
+        if not self.enabled:
+            yield
+            return
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats(name, len(self.stack))
+        if self.stack:
+            parent = self.stack[-1]
+            parent.peak_mem = max(parent.peak_mem, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        self.stack.append(stats)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            stats.calls += 1
+            stats.wall += wall
+            stats.cpu += time.process_time() - cpu_start
+            stats.peak_mem = max(stats.peak_mem, tracemalloc.get_traced_memory()[1])
+            self.stack.pop()
+            if self.stack:
+                self.stack[-1].peak_mem = max(self.stack[-1].peak_mem, stats.peak_mem)
+            self.spans.append(
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": (wall_start - self.origin) * 1e6,
+                    "dur": wall * 1e6,
+                    "pid": 1,
+                    "tid": 1,
+                }
+            )
+
+    def print_summary(self, file=None) -> None:
+        """Print a per-stage table of the recorded measurements (to the current sys.stderr by default)."""
+        if not self.stages:
+            return
+        file = sys.stderr if file is None else file
+        rows = [
+            (
+                "  " * s.depth + s.name,
+                str(s.calls),
+                f"{s.wall * 1000:.1f}",
+                f"{s.cpu * 1000:.1f}",
+                f"{s.files_read}/{s.files_written}",
+                f"{s.bytes_read / 1024:.1f}/{s.bytes_written / 1024:.1f}",
+                f"{s.peak_mem / 1024:.1f}",
+            )
+            for s in self.stages.values()
+        ]
+        headers = ("Stage", "Calls", "Wall ms", "CPU ms", "Files r/w", "KiB r/w", "Peak KiB")
+        widths = [max(len(h), max(len(r[i]) for r in rows)) for i, h in enumerate(headers)]
+        sep = "-" * (sum(widths) + 2 * (len(widths) - 1))
+        print("\nProfile:", file=file)
+        print(sep, file=file)
+        print("  ".join(h.ljust(w) if i == 0 else h.rjust(w) for i, (h, w) in enumerate(zip(headers, widths))), file=file)
+        print(sep, file=file)
+        for row in rows:
+            print("  ".join(c.ljust(w) if i == 0 else c.rjust(w) for i, (c, w) in enumerate(zip(row, widths))), file=file)
+        print(sep, file=file)
+
+    def write_chrome_trace(self, path: Path) -> None:
+        """Write the recorded stage spans in Chrome trace-event format (chrome://tracing, Perfetto)."""
+        path.write_text(json.dumps({"traceEvents": self.spans, "displayTimeUnit": "ms"}), encoding="utf-8")
+
+
+PROFILER = Profiler()
+
+
+def profiled(name: str):
+    """Decorator recording every call of a function as the named stage when profiling is enabled."""
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return fn(*args, **kwargs)
+            with PROFILER.stage(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def profiled_iter(name: str, iterable: Iterable) -> Iterator:
+    """Yield from iterable, recording the whole iteration as one call of the named stage.
+
+    The stage stays open while the consumer handles each item, so streamed
+    output is measured together with the computation producing it.
+    """
+    with PROFILER.stage(name):
+        yield from iterable
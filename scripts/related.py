@@ -0,0 +1,96 @@
+"""
+Precomputed related-content index consumed by the Hugo ``related.html`` partial.
+"""
+
+import heapq
+import json
+import math
+from collections import Counter, defaultdict
+from pathlib import Path, PurePosixPath
+
+from .constants import RELATED_TAG_WEIGHT, RELATED_TOP_K
+from .corpus import Corpus
+from .insights import collect_docs
+from .profiling import profiled
+from .utils import write_atomic
+
+# Strongest terms kept per document vector; the long tail barely moves the cosine
+RELATED_MAX_TERMS = 64
+
+
+def page_ref(rel: PurePosixPath) -> str:
+    """Return the site path Hugo's GetPage resolves for a content file."""
+    if rel.stem in ("index", "_index"):
+        return f"/{rel.parent.as_posix()}" if rel.parent.parts else "/"
+    return f"/{rel.with_suffix('').as_posix()}"
+
+
+def tfidf_vectors(docs: list[dict], max_terms: int = RELATED_MAX_TERMS) -> list[dict[str, float]]:
+    """Return an L2-normalized, pruned TF-IDF vector per document."""
+    total_docs = len(docs)
+    df = Counter()
+    for d in docs:
+        df.update(d["word_counts"].keys())
+
+    vectors = []
+    for d in docs:
+        weights = {}
+        if d["length"]:
+            for w, tf in d["word_counts"].items():
+                idf = math.log(total_docs / df[w])
+                if idf > 0:
+                    weights[w] = (tf / d["length"]) * idf
+        top = heapq.nlargest(max_terms, weights.items(), key=lambda x: x[1])
+        norm = math.sqrt(sum(x * x for _, x in top)) or 1.0
+        vectors.append({w: x / norm for w, x in top})
+    return vectors
+
+
+@profiled("related")
+def build_related(docs: list[dict], top_k: int = RELATED_TOP_K, tag_weight: float = RELATED_TAG_WEIGHT) -> dict[str, list[dict]]:
+    """Return the top-k related pages per document, scored by TF-IDF cosine and tag overlap.
+
+    Candidates come from inverted indexes over terms and tags, so only documents
+    sharing at least one of either are ever scored against each other.
+    """
+    vectors = tfidf_vectors(docs)
+    term_postings: dict[str, list[tuple[int, float]]] = defaultdict(list)
+    for i, vec in enumerate(vectors):
+        for w, x in vec.items():
+            term_postings[w].append((i, x))
+    tag_postings: dict[str, list[int]] = defaultdict(list)
+    for i, d in enumerate(docs):
+        for t in d["tags"]:
+            tag_postings[t].append(i)
+
+    paths = [PurePosixPath(d["path"].as_posix()) for d in docs]
+    related = {}
+    for i, d in enumerate(docs):
+        cosine: dict[int, float] = defaultdict(float)
+        for w, x in vectors[i].items():
+            for j, y in term_postings[w]:
+                cosine[j] += x * y
+        shared: Counter = Counter(j for t in d["tags"] for j in tag_postings[t])
+
+        scores = []
+        for j in cosine.keys() | shared.keys():
+            if j == i:
+                continue
+            overlap = shared.get(j, 0)
+            jaccard = overlap / (len(d["tags"]) + len(docs[j]["tags"]) - overlap) if overlap else 0.0
+            score = (1 - tag_weight) * cosine.get(j, 0.0) + tag_weight * jaccard
+            if score > 0:
+                scores.append((score, j))
+
+        best = heapq.nsmallest(top_k, scores, key=lambda s: (-s[0], paths[s[1]]))
+        related[paths[i].as_posix()] = [{"path": page_ref(paths[j]), "score": round(score, 4)} for score, j in best]
+    return related
+
+
+def run_related(corpus: Corpus, output: Path, top_k: int = RELATED_TOP_K, tag_weight: float = RELATED_TAG_WEIGHT, jobs: int = 1) -> None:
+    """Compute related pages for every document and write them as a Hugo data file."""
+    docs, _ = collect_docs(corpus, jobs)
+    related = build_related(docs, top_k, tag_weight)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(output, json.dumps(related, indent=2, sort_keys=True) + "\n")
+    print(f"Wrote related pages for {len(related)} documents to {output}")
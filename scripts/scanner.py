@@ -0,0 +1,188 @@
+"""
+Single-pass Markdown scanner shared by validation, insights and summary extraction.
+"""
+
+import re
+from functools import lru_cache
+
+from .corpus import Document
+
+# One alternative per construct, tried at each position in order. Every alternative
+# starts with a literal character so the regex engine can skip ahead to candidates;
+# fences, headings and setext underlines match the newline before them, and a
+# backtick fence's info string has no backticks.
+SCAN_RE = re.compile(
+    r"\n(?P<fence> {0,3}(?:`{3,}(?=[^`\n]*$)|~{3,}))"
+    r"|\n(?P<heading> {0,3}#{1,6}[ \t]+)"
+    r"|\n(?P<setext> {0,3}(?:=+|-+)[ \t]*$)"
+    r"|\\(?P<escape>[^\n])"
+    r"|`(?<!``)(?P<ticks>`*)(?!`)(?P<code>[^\n]*?)(?<!`)`(?P=ticks)(?!`)"
+    r"|<(?P<comment>!--[\s\S]*?-->)"
+    r"|\{\{(?P<shortcode>[<%][\s\S]*?[>%])\}\}"
+    r"|\{(?P<template>\{[^\n]*?\}\})"
+    r"|!\[(?P<alt>[^\]\n]*)\]\((?P<src>[^)\n]*)\)"
+    r"|\[(?P<label>(?:[^\[\]!]++|!\[[^\[\]]*\]\([^)]*\)|!)*+)\]\((?P<href>[^)\n]*)\)"
+    r'|<[a-zA-Z][^>\n]*?\bid="(?P<id>[^"]+)"',
+    re.MULTILINE,
+)
+# Optional closing hashes and trailing blanks of an ATX heading
+HEADING_END_RE = re.compile(r"(?:[ \t]+#+)?[ \t]*$")
+# Lines a paragraph cannot continue past: ATX headings, fences, underlines and thematic breaks
+PARAGRAPH_BOUNDARY_RE = re.compile(r" {0,3}(?:#{1,6}(?:[ \t]|$)|`{3,}|~{3,}|(?:[-=*_][ \t]*)+$)")
+# First lines of blocks a setext underline cannot turn into a heading: indented code,
+# list items, blockquotes, HTML, tables and shortcodes
+NOT_PARAGRAPH_RE = re.compile(r" {4}|\t| {0,3}(?:[-*+](?:[ \t]|$)|\d{1,9}[.)](?:[ \t]|$)|[>|<]|\{\{)")
+# Images and code spans inside link text
+LABEL_RE = re.compile(r"!\[([^\]]*)\]\(([^)]*)\)|(`+)[^`]*?\3")
+# Shortcode name (with a leading / for closing tags) and raw arguments
+SHORTCODE_CALL_RE = re.compile(r"[<%]\s*(/?[\w./-]*)\s*([\s\S]*?)\s*[>%]$")
+
+
+@lru_cache
+def fence_close_re(marker: str) -> re.Pattern:
+    """Return the pattern for the line closing a fence opened with marker."""
+    return re.compile(rf"^ {{0,3}}{re.escape(marker[0])}{{{len(marker)},}}[ \t]*$", re.MULTILINE)
+
+
+def link_target(raw: str) -> str:
+    """Return the destination of a link or image, without its optional title or angle brackets."""
+    raw = raw.strip()
+    if raw.startswith("<") and ">" in raw:
+        return raw[1 : raw.index(">")]
+    return raw.split(maxsplit=1)[0] if raw else ""
+
+
+def setext_paragraph(text: str, floor: int, underline: int) -> list[str]:
+    """Return the lines of the paragraph a setext underline at offset underline closes (none if it closes none).
+
+    Only lines from offset floor on are considered.
+    """
+    lines: list[str] = []
+    end = underline - 1
+    while end >= floor:
+        begin = max(text.rfind("\n", 0, end) + 1, floor)
+        line = text[begin:end]
+        if not line.strip() or PARAGRAPH_BOUNDARY_RE.match(line):
+            break
+        lines.append(line)
+        end = begin - 1
+    if lines and NOT_PARAGRAPH_RE.match(lines[-1]):
+        return []
+    return lines[::-1]
+
+
+class MarkdownScan:
+    """What one pass over a Markdown body found, outside code blocks, code spans and comments.
+
+    ``links``, ``images`` and ``shortcodes`` carry 1-based line and column numbers
+    in the scanned text; ``prose`` is the body with code, comments and shortcodes
+    blanked out and links and images reduced to their text.
+    """
+
+    __slots__ = ("headings", "html_ids", "images", "links", "prose", "shortcodes")
+
+    def __init__(self):
+        self.links: list[tuple[str, int, int]] = []
+        self.images: list[tuple[str, int, int]] = []
+        self.headings: list[tuple[int, str, int]] = []
+        self.shortcodes: list[tuple[str, str, int, int]] = []
+        self.html_ids: list[str] = []
+        self.prose = ""
+
+    def outline(self) -> dict:
+        """Return everything but the prose, in a form the parse cache can persist."""
+        return {"links": self.links, "images": self.images, "headings": self.headings, "shortcodes": self.shortcodes, "ids": self.html_ids}
+
+
+def scan_markdown(text: str, start: int = 0) -> MarkdownScan:
+    """Scan text from offset start once, collecting links, images, headings (ATX and setext) and shortcode calls.
+
+    Fenced code blocks (an unclosed fence runs to the end), code spans, HTML
+    comments and escaped characters hide whatever they contain. Line numbers
+    count from the start of text, so positions in a body point into the file.
+    """
+    scan = MarkdownScan()
+    pieces = []
+    # Offsets below are into text with a newline prepended, so the first line also follows one
+    at_line_start = start == 0 or text[start - 1] == "\n"
+    text = "\n" + text
+    emitted, pos = start + 1, start if at_line_start else start + 1
+    line, counted = text.count("\n", 1, start + 1) + 1, start + 1
+
+    def locate(offset: int) -> tuple[int, int]:
+        nonlocal line, counted
+        line += text.count("\n", counted, offset)
+        counted = offset
+        return line, offset - text.rfind("\n", 0, offset)
+
+    while (m := SCAN_RE.search(text, pos)) is not None:
+        kind = m.lastgroup
+        begin, pos = m.start(kind) if kind in ("fence", "heading", "setext") else m.start(), m.end()
+        if kind == "heading":
+            eol = text.find("\n", pos)
+            title = HEADING_END_RE.sub("", text[pos : eol if eol >= 0 else len(text)], count=1)
+            scan.headings.append((m.group(kind).count("#"), title, locate(begin)[0]))
+            continue
+        if kind == "setext":
+            # A paragraph underlined with = or - is a level 1 or 2 heading; otherwise the line is text or a break
+            lines = setext_paragraph(text, start + 1, begin)
+            if lines:
+                title = " ".join(line.strip() for line in lines)
+                scan.headings.append((1 if m.group(kind).lstrip(" ")[0] == "=" else 2, title, locate(begin)[0] - len(lines)))
+            continue
+        if kind == "escape":
+            continue
+        if kind == "id":
+            scan.html_ids.append(m.group("id"))
+            continue
+
+        pieces.append(text[emitted:begin])
+        if kind == "fence":
+            close = fence_close_re(m.group(kind).lstrip(" ")).search(text, pos)
+            pos = close.end() if close else len(text)
+            pieces.append(" ")
+        elif kind == "shortcode":
+            inner = m.group("shortcode")
+            call = SHORTCODE_CALL_RE.match(inner)
+            # {{</* name */>}} is Hugo's escape for showing a shortcode literally
+            if call and call.group(1) and not inner[1:].lstrip().startswith("/*"):
+                scan.shortcodes.append((call.group(1), call.group(2), *locate(begin)))
+            pieces.append(" ")
+        elif kind == "src":
+            scan.images.append((link_target(m.group("src")), *locate(begin)))
+            pieces.append(m.group("alt"))
+        elif kind == "href":
+            where = locate(begin)
+            label, label_start = m.group("label"), m.start("label")
+            if "!" in label or "`" in label:
+                for part in LABEL_RE.finditer(label):
+                    if part.group(1) is not None:
+                        scan.images.append((link_target(part.group(2)), *locate(label_start + part.start())))
+                label = LABEL_RE.sub(lambda part: part.group(1) or " ", label)
+            pieces.append(label)
+            if "{{" in m.group("href"):
+                # A templated destination, e.g. {{< ref "page" >}}: scan it for its shortcode instead
+                pos = m.start("href")
+            else:
+                scan.links.append((link_target(m.group("href")), *where))
+        else:
+            # Code spans, comments and template actions
+            pieces.append(" ")
+        emitted = pos
+
+    pieces.append(text[emitted:])
+    scan.prose = "".join(pieces)
+    return scan
+
+
+def scan_doc(doc: Document) -> MarkdownScan:
+    """Scan a document's body, recording its outline in memo so the parse cache can persist it."""
+    scan = scan_markdown(doc.text, doc.body_offset)
+    doc.memo["outline"] = scan.outline()
+    return scan
+
+
+def doc_outline(doc: Document) -> dict:
+    """Return a document's links, images, headings, shortcodes and HTML ids, scanning its body only if needed."""
+    outline = doc.memo.get("outline")
+    return outline if outline is not None else scan_doc(doc).outline()
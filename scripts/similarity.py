@@ -0,0 +1,164 @@
+"""
+Set-similarity search (Jaccard) for Systology insights: exact and MinHash/LSH.
+"""
+
+import random
+from collections import Counter, defaultdict
+from collections.abc import Hashable, Iterable
+from itertools import combinations
+
+# Mersenne prime modulus for the MinHash permutation family
+MINHASH_PRIME = (1 << 61) - 1
+MINHASH_PERMS = 128
+
+
+def jaccard_pairs_index(members: dict[Hashable, set[int]], threshold: float) -> list[tuple[Hashable, Hashable, float]]:
+    """Exact Jaccard pairs, counting intersections only for keys that share a member.
+
+    Keys are paired through an inverted index (member -> keys), so the cost is the
+    number of co-occurring pairs rather than the square of the number of keys.
+    Pairs are returned with keys in ``members`` order.
+    """
+    rank = {k: i for i, k in enumerate(members)}
+    by_member: dict[int, list[Hashable]] = defaultdict(list)
+    for k, ids in members.items():
+        for m in ids:
+            by_member[m].append(k)
+
+    overlap: Counter = Counter()
+    for keys in by_member.values():
+        keys.sort(key=rank.__getitem__)
+        overlap.update(combinations(keys, 2))
+
+    pairs = []
+    for (a, b), inter in overlap.items():
+        jaccard = inter / (len(members[a]) + len(members[b]) - inter)
+        if jaccard >= threshold:
+            pairs.append((a, b, jaccard))
+    return pairs
+
+
+def jaccard_pairs_bitset(members: dict[Hashable, set[int]], threshold: float) -> list[tuple[Hashable, Hashable, float]]:
+    """Exact Jaccard pairs over integer bitsets, pruning pairs whose sizes differ too much.
+
+    Suited to dense incidence (few keys, many shared members); ``J(A, B) <= |A| / |B|``
+    bounds the scan for each key to candidates of similar size.
+    """
+    rank = {k: i for i, k in enumerate(members)}
+    bits = {}
+    for k, ids in members.items():
+        mask = 0
+        for m in ids:
+            mask |= 1 << m
+        bits[k] = mask
+    by_size = sorted(members, key=lambda k: len(members[k]))
+
+    pairs = []
+    for i, a in enumerate(by_size):
+        size_a = len(members[a])
+        if size_a == 0:
+            continue
+        for b in by_size[i + 1 :]:
+            size_b = len(members[b])
+            if size_a < threshold * size_b:
+                break
+            inter = (bits[a] & bits[b]).bit_count()
+            if inter == 0:
+                continue
+            jaccard = inter / (size_a + size_b - inter)
+            if jaccard >= threshold:
+                pairs.append((a, b, jaccard) if rank[a] < rank[b] else (b, a, jaccard))
+    return pairs
+
+
+def minhash_params(num_perm: int = MINHASH_PERMS, seed: int = 0) -> list[tuple[int, int]]:
+    """Return the (a, b) coefficients of a fixed family of universal hash permutations."""
+    rng = random.Random(seed)
+    return [(rng.randrange(1, MINHASH_PRIME), rng.randrange(0, MINHASH_PRIME)) for _ in range(num_perm)]
+
+
+def minhash_signature(values: Iterable[int], params: list[tuple[int, int]]) -> tuple[int, ...]:
+    """Return the MinHash signature of a non-empty set of integers."""
+    values = list(values)
+    return tuple(min((a * v + b) % MINHASH_PRIME for v in values) for a, b in params)
+
+
+def one_permutation_signature(values: Iterable[int], num_bins: int = MINHASH_PERMS) -> tuple[int, ...]:
+    """Return a MinHash signature of a non-empty set of uniform 64-bit hashes in a single pass.
+
+    One-permutation hashing: each value falls into bin ``value % num_bins`` and every
+    bin keeps its minimum, so the cost is O(n) rather than the O(n * num_perm) of
+    minhash_signature. Empty bins borrow the minimum of the next non-empty bin,
+    offset by the distance (rotation densification), which keeps the fraction of
+    matching components an unbiased estimate of Jaccard similarity.
+    """
+    mins: list[int | None] = [None] * num_bins
+    # Descending, so the last value written to each bin is its minimum
+    for v in sorted(values, reverse=True):
+        mins[v % num_bins] = v
+    if None in mins:
+        source = mins[:]
+        nearest, distance = None, 0
+        # Walk right to left over two laps so bins near the end can borrow across the wrap
+        for i in reversed(range(2 * num_bins)):
+            b = i % num_bins
+            if source[b] is not None:
+                nearest, distance = source[b], 0
+            else:
+                distance += 1
+                if i < num_bins:
+                    mins[b] = nearest + (distance << 64)
+    return tuple(mins)
+
+
+def lsh_rows(num_perm: int, threshold: float) -> int:
+    """Pick rows per band so the LSH S-curve midpoint sits a little below threshold."""
+    best = 1
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold * 0.9:
+            best = rows
+    return best
+
+
+def lsh_candidates(signatures: dict[Hashable, tuple[int, ...]], rows: int) -> set[tuple[Hashable, Hashable]]:
+    """Return key pairs that collide in at least one LSH band, in ``signatures`` order."""
+    rank = {k: i for i, k in enumerate(signatures)}
+    candidates = set()
+    num_perm = len(next(iter(signatures.values()), ()))
+    for start in range(0, num_perm, rows):
+        buckets: dict[tuple[int, ...], list[Hashable]] = defaultdict(list)
+        for k, sig in signatures.items():
+            buckets[sig[start : start + rows]].append(k)
+        for keys in buckets.values():
+            if len(keys) > 1:
+                keys.sort(key=rank.__getitem__)
+                candidates.update(combinations(keys, 2))
+    return candidates
+
+
+def jaccard_pairs_minhash(members: dict[Hashable, set[int]], threshold: float, num_perm: int = MINHASH_PERMS) -> list[tuple[Hashable, Hashable, float]]:
+    """Approximate Jaccard pairs: LSH candidates from MinHash signatures, verified exactly.
+
+    Never reports a pair below threshold, but may miss pairs close to it.
+    """
+    params = minhash_params(num_perm)
+    signatures = {k: minhash_signature(ids, params) for k, ids in members.items() if ids}
+    pairs = []
+    for a, b in lsh_candidates(signatures, lsh_rows(num_perm, threshold)):
+        inter = len(members[a] & members[b])
+        jaccard = inter / (len(members[a]) + len(members[b]) - inter)
+        if jaccard >= threshold:
+            pairs.append((a, b, jaccard))
+    return pairs
+
+
+def jaccard_pairs(members: dict[Hashable, set[int]], threshold: float, method: str = "index") -> list[tuple[Hashable, Hashable, float]]:
+    """Find key pairs whose member sets have Jaccard similarity >= threshold (threshold > 0)."""
+    if method == "bitset":
+        return jaccard_pairs_bitset(members, threshold)
+    if method == "minhash":
+        return jaccard_pairs_minhash(members, threshold)
+    return jaccard_pairs_index(members, threshold)
@@ -5,9 +5,13 @@ Logic for checking if deep-dive documentation is in sync with its referenced rep
 import json
 import re
 import subprocess
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
+from .constants import SYNC_WORKERS
+from .profiling import profiled
+
 
 def run_cmd(args: list[str], cwd: Path | None = None) -> str | None:
     """Helper to run shell commands and return stdout, returning None on failure."""
@@ -133,17 +137,22 @@ def compare_timestamps(ts1: str, ts2: str) -> int:
         return 0
 
 
-def run_check_sync(content_dir: Path, search_paths: list[Path], print_json: bool = False) -> None:
-    """Validate that deep-dive docs are in sync with referenced repositories."""
+@profiled("check_sync")
+def run_check_sync(content_dir: Path, search_paths: list[Path], print_json: bool = False, workers: int = SYNC_WORKERS) -> None:
+    """Validate that deep-dive docs are in sync with referenced repositories.
+
+    Each document and each distinct repository is queried once, with up to
+    ``workers`` queries running at a time.
+    """
     repo_root = content_dir.parent.parent
     deep_dives_dir = content_dir / "deep-dives"
 
     # 1. Scan local directories for git clones
     local_repos = find_local_repos(search_paths)
 
-    results = []
-
-    # 2. Iterate through all deep-dive markdown files
+    # 2. Collect the huangsam repositories each deep-dive markdown file references
+    # e.g., https://github.com/huangsam/mailprune
+    references: list[tuple[Path, list[str]]] = []
     if deep_dives_dir.is_dir():
         for p in sorted(deep_dives_dir.glob("*.md")):
             if p.name.startswith("."):
@@ -154,24 +163,29 @@ def run_check_sync(content_dir: Path, search_paths: list[Path], print_json: bool
             except OSError:
                 continue
 
-            # Find all references to huangsam repositories
-            # e.g., https://github.com/huangsam/mailprune
             referenced_repos = re.findall(r"https://github.com/(huangsam/[\w\-]+)", text)
-            if not referenced_repos:
-                continue
+            if referenced_repos:
+                references.append((p, sorted(set(referenced_repos))))
 
-            doc_ts = get_git_timestamp(p, repo_root)
+    # 3. Query every document and every distinct repository concurrently
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        doc_queries = [pool.submit(get_git_timestamp, p, repo_root) for p, _ in references]
+        repo_queries: dict[str, tuple[Path | None, Future]] = {}
+        for _, repos in references:
+            for repo in repos:
+                if repo not in repo_queries:
+                    local_path = local_repos.get(repo.split("/")[-1].lower())
+                    repo_queries[repo] = (local_path, pool.submit(get_repo_last_commit, repo, local_path))
+
+        for (p, repos), doc_query in zip(references, doc_queries):
+            doc_ts = doc_query.result()
             if not doc_ts:
                 continue
 
-            # Keep unique repos
-            unique_repos = sorted(set(referenced_repos))
-
-            for repo in unique_repos:
-                repo_basename = repo.split("/")[-1].lower()
-                local_path = local_repos.get(repo_basename)
-
-                repo_ts = get_repo_last_commit(repo, local_path)
+            for repo in repos:
+                local_path, repo_query = repo_queries[repo]
+                repo_ts = repo_query.result()
 
                 status = "unknown"
                 if repo_ts:
@@ -194,7 +208,7 @@ def run_check_sync(content_dir: Path, search_paths: list[Path], print_json: bool
                     }
                 )
 
-    # 3. Output results
+    # 4. Output results
     if print_json:
         print(json.dumps(results, indent=2))
         return
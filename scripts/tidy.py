@@ -0,0 +1,58 @@
+"""
+Fused tidy pipeline chaining in-memory transforms over each Systology document.
+"""
+
+from collections.abc import Callable
+from functools import partial
+
+from .content import add_summary_desc, normalize_text
+from .corpus import Corpus
+from .formatter import process_md_format
+from .metadata import sort_tags_in_text, tagup_site
+from .profiling import PROFILER, profiled
+from .utils import parallel_map
+
+# Ordered (label, transform) pairs; each transform maps Markdown text to Markdown text
+Step = tuple[str, Callable[[str], str]]
+
+CONTENT_STEPS: list[Step] = [
+    ("Normalized", normalize_text),
+    ("Added summary/description in", add_summary_desc),
+    ("Applied tags update in", tagup_site),
+    ("Sorted tags in", sort_tags_in_text),
+    ("Formatted", process_md_format),
+]
+
+ARCHETYPE_STEPS: list[Step] = [
+    ("Formatted", process_md_format),
+]
+
+
+def tidy_text(text: str, steps: list[Step]) -> tuple[str, list[str]]:
+    """Chain every step over text, returning the result and the labels of steps that changed it."""
+    changed = []
+    for label, transform in steps:
+        with PROFILER.stage(transform.__name__):
+            new_text = transform(text)
+        if new_text != text:
+            changed.append(label)
+            text = new_text
+    return text, changed
+
+
+@profiled("tidy")
+def run_tidy(corpus: Corpus, steps: list[Step], jobs: int = 1) -> None:
+    """Tidy every document in one pass, writing each changed file once."""
+    print(f"Running tidy on {corpus.root}...")
+    counts = dict.fromkeys((label for label, _ in steps), 0)
+    written = 0
+    results = parallel_map(partial(tidy_text, steps=steps), [doc.text for doc in corpus], jobs)
+    for doc, (new_text, changed) in zip(corpus, results):
+        for label in changed:
+            counts[label] += 1
+        if new_text != doc.text:
+            doc.write(new_text)
+            written += 1
+    for label, count in counts.items():
+        print(f"  {label} {count} files")
+    print(f"  Wrote {written} files")
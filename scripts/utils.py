@@ -2,9 +2,12 @@
 Shared utility functions for Systology management scripts.
 """
 
-import re
+import os
+import tempfile
+from collections.abc import Callable, Sequence
+from pathlib import Path
 
-from .constants import FM_DELIM
+from .profiling import PROFILER
 
 
 def strip_quotes(s: str) -> str:
@@ -14,30 +17,57 @@ def strip_quotes(s: str) -> str:
     return s
 
 
-def extract_fm_body(text: str) -> tuple[list[str] | None, list[str]]:
-    """Split Markdown text into frontmatter lines and body lines."""
-    lines = text.splitlines()
-    i = 0
-    while i < len(lines) and lines[i].strip() == "":
-        i += 1
-    if i < len(lines) and lines[i].strip() == FM_DELIM:
-        j = i + 1
-        while j < len(lines) and lines[j].strip() != FM_DELIM:
-            j += 1
-        if j >= len(lines):
-            return None, lines[i:]
-        return lines[i + 1 : j], lines[j + 1 :]
-    return None, lines[i:]
-
-
-def parse_fm(fm_lines: list[str]) -> dict[str, str]:
-    """Parse frontmatter lines into a key-value dictionary."""
-    fm = {}
-    pattern = re.compile(r"^\s*([A-Za-z0-9_\-]+)\s*:\s*(?:\"([^\"]*)\"|'([^']*)'|([^#].*))?")
-    for ln in fm_lines:
-        m = pattern.match(ln)
-        if m:
-            key = m.group(1)
-            val = m.group(2) or m.group(3) or (m.group(4).strip() if m.group(4) else "")
-            fm[key] = val
-    return fm
+def resolve_jobs(jobs: int) -> int:
+    """Translate a --jobs value into a worker count, where 0 means one per CPU."""
+    return jobs if jobs > 0 else os.cpu_count() or 1
+
+
+def parallel_map(fn: Callable, items: Sequence, jobs: int = 1) -> list:
+    """Apply fn to every item, fanning out to a process pool in chunks when jobs > 1.
+
+    Results are returned in input order, so output is identical to a serial run.
+    fn and items must be picklable (module-level functions or functools.partial).
+    """
+    if jobs <= 1 or len(items) < 2:
+        return [fn(item) for item in items]
+    # Imported here: concurrent.futures costs more to load than most serial runs take
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, len(items) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(fn, items, chunksize=chunksize))
+
+
+def decode_text(raw: bytes) -> str:
+    """Decode raw file bytes the way Path.read_text does, including universal newlines."""
+    return raw.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+
+def read_text(path: Path) -> str:
+    """Read a UTF-8 text file, accounting the bytes to the active profiling stage."""
+    raw = path.read_bytes()
+    PROFILER.record_read(len(raw))
+    return decode_text(raw)
+
+
+def write_atomic(path: Path, data: str | bytes) -> None:
+    """Write data to path via a sibling temp file and rename, so readers never see a partial file."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        try:
+            mode = path.stat().st_mode & 0o7777
+        except FileNotFoundError:
+            # New file: the mode open() would have given it, not mkstemp's owner-only 0600
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+        PROFILER.record_write(len(data))
+    except BaseException:
+        os.unlink(tmp)
+        raise
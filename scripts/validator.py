@@ -2,81 +2,115 @@
 Logic for validating Systology site content.
 """
 
-import re
+from functools import partial
 from pathlib import Path
-
-from .constants import FM_TITLE, MD_EXT
-from .utils import extract_fm_body, parse_fm
+from typing import TYPE_CHECKING
+from urllib.parse import urldefrag
+
+from .assets import AssetBudget, format_size
+from .constants import FM_TITLE, STATIC_DIR
+from .corpus import Corpus, Document
+from .linkindex import LinkIndex, page_links
+from .profiling import profiled
+from .scanner import doc_outline
+from .utils import parallel_map
+
+if TYPE_CHECKING:
+    from .external import ExternalChecker
+
+
+def page_images(doc: Document, index: LinkIndex) -> tuple[list[tuple[str, int, int, Path]], list[tuple[str, int, int]]]:
+    """Split a page's local image sources into found (with their file) and missing; remote and data: sources are skipped."""
+    found, missing = [], []
+    source = index.rel(doc.path)
+    for src, line, col in doc_outline(doc)["images"]:
+        if src.startswith(("http", "https", "data:")):
+            continue
+        path = index.image_file(src, source)
+        if path is None:
+            missing.append((src, line, col))
+        else:
+            found.append((src, line, col, path))
+    return found, missing
 
 
-def check_file(p: Path, content_root: Path) -> list[str]:
-    """Validate a single Markdown file for missing frontmatter, broken links, or missing images."""
+def check_file(doc: Document, index: LinkIndex, budget: AssetBudget | None = None) -> list[str]:
+    """Validate a single Markdown document for missing frontmatter, broken links or anchors, missing images or image weight."""
     errors = []
-    try:
-        text = p.read_text(encoding="utf-8")
-    except OSError as e:
-        return [f"Could not read file: {e}"]
-
-    fm_lines, _body_lines = extract_fm_body(text)
 
     # 1. Frontmatter Validation
-    if fm_lines is None:
+    if doc.fm_lines is None:
         errors.append("Missing frontmatter")
     else:
-        fm = parse_fm(fm_lines)
+        fm = doc.fm
         if FM_TITLE not in fm or not fm[FM_TITLE].strip():
             errors.append(f"Missing '{FM_TITLE}' in frontmatter")
 
-    # 2. Internal Link Validation
-    base_dir = p.parent
-    links = re.findall(r"\[([^\]]+)\]\(([^)]+)\)", text)
-    for _, link in links:
-        link = link.strip()
-        if link.startswith(("#", "http", "https", "mailto:", "tel:")):
-            continue
-        if "{{" in link or "}}" in link:
-            continue
-
-        target = None
-        if link.startswith("/"):
-            target = content_root / link.lstrip("/")
-        else:
-            target = base_dir / link
-
-        if target and not target.exists() and target.with_suffix(MD_EXT).exists():
-            target = target.with_suffix(MD_EXT)
-
-        if target and not target.exists():
-            errors.append(f"Broken link: {link}")
+    # 2. Internal Link Validation, including #fragments against the target page's headings
+    source = index.rel(doc.path)
+    links, refs = page_links(doc)
+    for link, line, col in links:
+        error = index.check_link(link, source)
+        if error:
+            errors.append(f"{error} (line {line}, col {col})")
+    for ref, line, col in refs:
+        error = index.check_link(ref, source, ref=True)
+        if error:
+            errors.append(f"{error} (line {line}, col {col})")
 
     # 3. Image Validation
-    images = re.findall(r"!\[([^\]]*)\]\(([^)]+)\)", text)
-    for _, src in images:
-        src = src.strip()
-        if src.startswith(("http", "https", "data:")):
-            continue
+    images, missing = page_images(doc, index)
+    for src, line, col in missing:
+        errors.append(f"Missing image: {src} (line {line}, col {col})")
 
-        target = None
-        if src.startswith("/"):
-            static_dir = content_root.parent / "static"
-            target = static_dir / src.lstrip("/")
-        else:
-            target = base_dir / src
-
-        if target and not target.exists():
-            errors.append(f"Missing image: {src}")
+    # 4. Image weight budgets, from file sizes and headers only
+    if budget is not None:
+        errors.extend(budget.check(images))
 
     return errors
 
 
-def run_check(content_dir: Path) -> None:
-    """Run comprehensive validation across all Markdown files in the content directory."""
+@profiled("check")
+def run_check(
+    corpus: Corpus,
+    jobs: int = 1,
+    only: set[Path] | None = None,
+    external: "ExternalChecker | None" = None,
+    budget: AssetBudget | None = None,
+    weights: bool = False,
+) -> None:
+    """Run comprehensive validation across the Markdown documents in the corpus.
+
+    Links are resolved against an index of the whole corpus; with ``only``, just
+    those files are validated and checked for inbound links. With an ``external``
+    checker, http(s) links are probed as well, each distinct URL once. A
+    ``budget`` flags oversized images and pages; ``weights`` lists every page's
+    total local image weight, heaviest first.
+    """
     print("Running check...")
+    content_dir = corpus.root
+    index = LinkIndex.build(corpus, content_dir.parent / STATIC_DIR)
+    results = {p: [f"Could not read file: {e}"] for p, e in corpus.unreadable.items() if not p.name.startswith(".") and (only is None or p in only)}
+    docs = [doc for doc in corpus if not doc.path.name.startswith(".") and (only is None or doc.path in only)]
+    for doc, file_errors in zip(docs, parallel_map(partial(check_file, index=index, budget=budget), docs, jobs)):
+        results[doc.path] = file_errors
+
+    if external is not None:
+        # asyncio and ssl are only worth loading when links are actually probed
+        from .external import external_links
+
+        links = {doc.path: external_links(doc) for doc in docs}
+        broken, probed = external.check(url for found in links.values() for url, _, _ in found)
+        for p, found in links.items():
+            for url, line, col in found:
+                reason = broken[urldefrag(url)[0]]
+                if reason:
+                    results[p].append(f"Broken external link: {url}: {reason} (line {line}, col {col})")
+        print(f"Checked {len(broken)} external URLs ({probed} probed, {len(broken) - probed} cached).")
+
     error_count = 0
-    for p in sorted(content_dir.rglob(f"*{MD_EXT}")):
-        if p.name.startswith("."):
-            continue
-        file_errors = check_file(p, content_dir)
+    for p in sorted(results):
+        file_errors = results[p]
         if file_errors:
             print(f"\n{p.relative_to(content_dir.parent)}:")
             for err in file_errors:
@@ -87,3 +121,20 @@ def run_check(content_dir: Path) -> None:
         print("  No issues found.")
     else:
         print(f"\n  Found {error_count} issues.")
+
+    if weights:
+        budget = budget or AssetBudget()
+        rows = []
+        for doc in docs:
+            total, count = budget.page_weight(page_images(doc, index)[0])
+            if count:
+                rows.append((-total, doc.path, count))
+        print(f"\nPage weight (local images): {len(rows)} pages")
+        for total, p, count in sorted(rows):
+            print(f"  {format_size(-total):>8}  {p.relative_to(content_dir.parent)} ({count} image{'s' if count != 1 else ''})")
+
+    orphans = index.orphans(docs)
+    if orphans:
+        print(f"\nOrphaned pages (no inbound links from other pages): {len(orphans)}")
+        for rel in orphans:
+            print(f"  - {content_dir.name}/{rel}")
@@ -0,0 +1,214 @@
+"""
+Resident watch mode: keep the corpus in memory and re-validate pages as they are saved.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+from .constants import MD_EXT, STATIC_DIR
+from .corpus import Document, load_corpus
+from .linkindex import LinkIndex
+from .tidy import CONTENT_STEPS, tidy_text
+from .validator import check_file
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+INOTIFY_EVENT = struct.Struct("iIII")
+
+# Quiet period used to coalesce the burst of events an editor emits on save
+DEBOUNCE_SECS = 0.05
+
+
+def is_watched_file(p: Path) -> bool:
+    """Whether a path is a content page worth reacting to (skips editor and temp dotfiles)."""
+    return p.suffix == MD_EXT and not p.name.startswith(".")
+
+
+def markdown_stamps(root: Path) -> dict[Path, tuple[int, int]]:
+    """Map every watched Markdown file under root to its (mtime_ns, size) stamp."""
+    stamps = {}
+    for p in root.rglob(f"*{MD_EXT}"):
+        if not is_watched_file(p):
+            continue
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        stamps[p] = (st.st_mtime_ns, st.st_size)
+    return stamps
+
+
+class PollingWatcher:
+    """Portable watcher that rescans file stamps on a fixed interval."""
+
+    def __init__(self, root: Path, interval: float = 0.5):
+        self.root = root
+        self.interval = interval
+        self.stamps = markdown_stamps(root)
+
+    def wait(self) -> set[Path]:
+        """Block until at least one Markdown file is created, modified or removed."""
+        while True:
+            time.sleep(self.interval)
+            stamps = markdown_stamps(self.root)
+            changed = {p for p in stamps.keys() | self.stamps.keys() if stamps.get(p) != self.stamps.get(p)}
+            self.stamps = stamps
+            if changed:
+                return changed
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Linux watcher driven by inotify(7) through libc, watching every directory under root."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs: dict[int, Path] = {}
+        self._add_tree(root)
+
+    def _add_tree(self, top: Path) -> None:
+        for dirpath, _, _ in os.walk(top):
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+            if wd >= 0:
+                self.dirs[wd] = Path(dirpath)
+
+    def _read_events(self) -> set[Path]:
+        changed = set()
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(buf):
+                wd, mask, _cookie, length = INOTIFY_EVENT.unpack_from(buf, offset)
+                raw_name = buf[offset + INOTIFY_EVENT.size : offset + INOTIFY_EVENT.size + length]
+                offset += INOTIFY_EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    # Events were dropped; fall back to treating every page as changed
+                    changed.update(markdown_stamps(self.root))
+                    continue
+                parent = self.dirs.get(wd)
+                if parent is None:
+                    continue
+                path = parent / os.fsdecode(raw_name.rstrip(b"\0"))
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self._add_tree(path)
+                        changed.update(markdown_stamps(path))
+                elif is_watched_file(path):
+                    changed.add(path)
+
+    def wait(self) -> set[Path]:
+        """Block until at least one Markdown file changes, then drain the burst of related events."""
+        changed: set[Path] = set()
+        while not changed:
+            select.select([self.fd], [], [])
+            changed |= self._read_events()
+            while select.select([self.fd], [], [], DEBOUNCE_SECS)[0]:
+                changed |= self._read_events()
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def make_watcher(root: Path, force_poll: bool = False, interval: float = 0.5):
+    """Return an inotify watcher where available, otherwise a polling one."""
+    if not force_poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root, interval)
+
+
+def links_to(doc: Document, p: Path) -> bool:
+    """Cheap pre-filter for documents that may reference p by file name or permalink."""
+    return p.name in doc.text or f"/{p.stem}" in doc.text
+
+
+def report(doc: Document, index: LinkIndex, elapsed_ms: float) -> None:
+    """Print the validation result for a single document."""
+    rel = doc.path.relative_to(index.content_root.parent)
+    errors = check_file(doc, index)
+    if not errors:
+        print(f"[ok] {rel} ({elapsed_ms:.1f} ms)")
+        return
+    print(f"[{len(errors)} issues] {rel} ({elapsed_ms:.1f} ms)")
+    for err in errors:
+        print(f"  - {err}")
+
+
+def run_watch(content_dir: Path, tidy: bool = False, force_poll: bool = False, interval: float = 0.5) -> None:
+    """Keep the corpus resident and re-run tidy transforms and validators on every saved page."""
+    corpus = load_corpus(content_dir)
+    index = LinkIndex.build(corpus, content_dir.parent / STATIC_DIR)
+    docs = {doc.path: doc for doc in corpus if is_watched_file(doc.path)}
+    watcher = make_watcher(content_dir, force_poll, interval)
+    kind = "polling" if isinstance(watcher, PollingWatcher) else "inotify"
+    print(f"Watching {content_dir} ({len(docs)} files, {kind}). Press Ctrl+C to stop.")
+
+    try:
+        while True:
+            changed = watcher.wait()
+            start = time.perf_counter()
+            recheck: set[Path] = set()
+            for p in sorted(changed):
+                doc = docs.get(p)
+                try:
+                    text = p.read_text(encoding="utf-8")
+                except OSError:
+                    if docs.pop(p, None) is not None:
+                        index.remove_page(p)
+                        print(f"[removed] {p.relative_to(content_dir.parent)}")
+                        recheck.update(q for q, d in docs.items() if links_to(d, p))
+                    continue
+                if doc is not None and doc.text == text:
+                    # Our own tidy write, or a save that did not change anything
+                    continue
+                if doc is None:
+                    doc = docs[p] = Document(p, text)
+                    recheck.update(q for q, d in docs.items() if q != p and links_to(d, p))
+                else:
+                    doc.update(text)
+                if tidy:
+                    new_text, _ = tidy_text(text, CONTENT_STEPS)
+                    if new_text != text:
+                        doc.write(new_text)
+                        print(f"[tidy] {p.relative_to(content_dir.parent)}")
+                anchors = index.anchors.get(index.rel(p))
+                index.add_page(doc)
+                if anchors is not None and anchors != index.anchors[index.rel(p)]:
+                    # Headings changed, so #fragment links into this page may have broken or been fixed
+                    recheck.update(q for q, d in docs.items() if q != p and links_to(d, p))
+                recheck.add(p)
+
+            for p in sorted(recheck):
+                report(docs[p], index, (time.perf_counter() - start) * 1000)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+    finally:
+        watcher.close()
@@ -0,0 +1,34 @@
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from scripts.bench import generate_corpus
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+class TimeStagesTest(unittest.TestCase):
+    def test_stages_write_nothing(self):
+        # A separate process, so output bound to the real stdout at import time is caught too
+        with tempfile.TemporaryDirectory() as tmp:
+            content_dir = generate_corpus(Path(tmp), ROOT / "site" / "archetypes", 30)
+            res = subprocess.run(
+                [
+                    sys.executable,
+                    "-c",
+                    "import sys; from pathlib import Path; from scripts.bench import time_stages; time_stages(Path(sys.argv[1]))",
+                    str(content_dir),
+                ],
+                cwd=ROOT,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        self.assertEqual(res.stdout, "")
+        self.assertEqual(res.stderr, "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from scripts.external import MAX_REDIRECTS, ExternalCache, ExternalChecker
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def respond(self):
+        if self.client_address in self.server.doomed:
+            # The connection went stale while idle: drop it without answering
+            self.server.doomed.discard(self.client_address)
+            self.close_connection = True
+            return
+        self.server.connections.add(self.client_address)
+        self.server.requests.append((self.command, self.path))
+        path, location = self.path, None
+        if path.startswith("/ok"):
+            status = 200
+        elif path == "/nohead":
+            status = 405 if self.command == "HEAD" else 200
+        elif path.startswith("/hop/"):
+            # /hop/N redirects to /hop/N-1, and /hop/0 to a page that works
+            n = int(path.rsplit("/", 1)[1])
+            status, location = 302, f"/hop/{n - 1}" if n else "/ok"
+        elif path == "/limited":
+            status = 429
+        elif path == "/slow":
+            time.sleep(1)
+            status = 200
+        elif path == "/stale":
+            status = 200
+            self.server.doomed.add(self.client_address)
+        elif path == "/err":
+            status = 500
+        else:
+            status = 404
+        body = b"" if self.command == "HEAD" else b"body"
+        self.send_response(status)
+        if location:
+            self.send_header("Location", location)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_HEAD = respond
+    do_GET = respond
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    block_on_close = False
+
+
+class ExternalCheckerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = Server(("127.0.0.1", 0), Handler)
+        cls.server.connections = set()
+        cls.server.requests = []
+        cls.server.doomed = set()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.connections.clear()
+        self.server.requests.clear()
+
+    def check(self, *paths, **kwargs):
+        kwargs.setdefault("timeout", 5.0)
+        results, _ = ExternalChecker(**kwargs).check(self.base + p for p in paths)
+        return [results[self.base + p] for p in paths]
+
+    def test_ok(self):
+        self.assertEqual(self.check("/ok"), [None])
+        self.assertEqual(self.server.requests, [("HEAD", "/ok")])
+
+    def test_not_found_is_confirmed_with_get(self):
+        self.assertEqual(self.check("/missing"), ["HTTP 404"])
+        self.assertEqual(self.server.requests, [("HEAD", "/missing"), ("GET", "/missing")])
+
+    def test_head_refused_falls_back_to_get(self):
+        self.assertEqual(self.check("/nohead"), [None])
+
+    def test_redirects(self):
+        self.assertEqual(self.check(f"/hop/{MAX_REDIRECTS - 1}"), [None])
+        self.assertEqual(self.check(f"/hop/{MAX_REDIRECTS}"), ["too many redirects"])
+
+    def test_only_lasting_results_are_cached(self):
+        urls = [self.base + p for p in ("/limited", "/err", "/ok", "/missing")]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "external.bin"
+            results, probed = ExternalChecker(ExternalCache(path, 3600)).check(urls)
+            self.assertEqual([results[u] for u in urls], [None, "HTTP 500", None, "HTTP 404"])
+            self.assertEqual(probed, 4)
+            reloaded = ExternalCache(path, 3600)
+            self.assertEqual(sorted(reloaded.entries), sorted(urls[2:]))
+            # Cached results are used without probing; rate-limited and server errors are probed again
+            self.server.requests.clear()
+            results, probed = ExternalChecker(reloaded).check(urls)
+            self.assertEqual([results[u] for u in urls], [None, "HTTP 500", None, "HTTP 404"])
+            self.assertEqual(probed, 2)
+            self.assertEqual({p for _, p in self.server.requests}, {"/limited", "/err"})
+
+    def test_timeout(self):
+        self.assertEqual(self.check("/slow", timeout=0.2), ["timed out"])
+
+    def test_keep_alive_connection_is_reused(self):
+        self.assertEqual(self.check(*(f"/ok{i}" for i in range(6)), per_host=1), [None] * 6)
+        self.assertEqual(len(self.server.requests), 6)
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_stale_connection_is_retried(self):
+        self.assertEqual(self.check("/stale", "/ok", per_host=1), [None] * 2)
+        self.assertEqual(self.server.requests, [("HEAD", "/stale"), ("HEAD", "/ok")])
+        self.assertEqual(len(self.server.connections), 2)
+
+    def test_connection_refused(self):
+        server = Server(("127.0.0.1", 0), Handler)
+        port = server.server_address[1]
+        server.server_close()
+        results, _ = ExternalChecker(timeout=5.0).check([f"http://127.0.0.1:{port}/x"])
+        self.assertEqual(results, {f"http://127.0.0.1:{port}/x": "connection refused"})
+
+
+if __name__ == "__main__":
+    unittest.main()
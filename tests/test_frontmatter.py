@@ -0,0 +1,37 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from scripts.frontmatter import INLINE_LIST, SCALAR, parse_frontmatter, read_header
+from scripts.metadata import sort_tags_in_text
+
+MULTILINE = "---\ntitle: X\ntags: [zeta,\n  alpha]\nsummary: s\n---\nbody [a] text\n"
+
+
+class FlowListTest(unittest.TestCase):
+    def test_flow_list_continues_over_indented_lines(self):
+        header = parse_frontmatter(MULTILINE)
+        self.assertEqual(header.tags, ["zeta", "alpha"])
+        self.assertEqual(header.fields["tags"].kind, INLINE_LIST)
+        self.assertEqual(header.fields["summary"].value, "s")
+        self.assertEqual(header.lines, ["title: X", "tags: [zeta,", "  alpha]", "summary: s"])
+        self.assertEqual(MULTILINE[header.body_offset :], "body [a] text\n")
+
+    def test_rewrite_replaces_whole_span(self):
+        self.assertEqual(sort_tags_in_text(MULTILINE), "---\ntitle: X\ntags: [alpha, zeta]\nsummary: s\n---\nbody [a] text\n")
+
+    def test_unclosed_list_stays_a_scalar(self):
+        for text in ("---\ntags: [a,\nb: c\n---\n", "---\ntags: [a,\n  b\n---\n"):
+            header = parse_frontmatter(text)
+            self.assertEqual(header.fields["tags"].kind, SCALAR)
+            self.assertEqual(header.tags, ["[a,"])
+
+    def test_read_header_matches_whole_text(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            p = Path(tmp) / "doc.md"
+            p.write_text(MULTILINE, encoding="utf-8")
+            self.assertEqual(parse_frontmatter(read_header(p)).tags, ["zeta", "alpha"])
+
+
+if __name__ == "__main__":
+    unittest.main()
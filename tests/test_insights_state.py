@@ -0,0 +1,139 @@
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+from scripts.corpus import load_corpus
+from scripts.insights import collect_docs, collect_tag_cooccurrence, cross_reference_counts, iter_tag_recommendations
+from scripts.insights_state import InsightsState
+
+SECTIONS = ("designs", "principles", "deep-dives")
+TAGS = ("caching", "queues", "data-pipelines", "monitoring", "storage", "kernel-scheduler", "consistency")
+# Includes the parts of the compound tags, so compound matches come and go with edits
+VOCAB = ["data", "pipelines", "kernel", "scheduler", "cache", "queue"] + [f"{a}{b}{c}word" for a in "klmn" for b in "pqrs" for c in "tuv"]
+
+# (top_k, min_shared, redundancy threshold, top, method)
+DEFAULT_OPTIONS = (0, 1, 0.5, 0, "index")
+
+
+class InsightsStateTest(unittest.TestCase):
+    """Incremental refreshes must give exactly what a cold run over the same corpus gives."""
+
+    def setUp(self):
+        self.rng = random.Random(7)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name) / "content"
+        self.state_path = Path(self.tmp.name) / "insights.bin"
+        for i in range(24):
+            self.write(f"{SECTIONS[i % 3]}/page-{i}.md")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel, words=None, tags=None):
+        words = words if words is not None else self.rng.choices(VOCAB, k=self.rng.randint(5, 40))
+        tags = tags if tags is not None else sorted(set(self.rng.sample(TAGS, self.rng.randint(1, 3))))
+        path = self.root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f'---\ntitle: "{path.stem}"\ntags: [{", ".join(tags)}]\n---\n\n{" ".join(words)}\n', encoding="utf-8")
+
+    def body_words(self, rel):
+        return (self.root / rel).read_text(encoding="utf-8").split("---\n", 2)[2].split()
+
+    def assert_refresh_matches_cold(self, options=DEFAULT_OPTIONS):
+        top_k, min_shared, threshold, top, method = options
+        docs, global_tags = collect_docs(load_corpus(self.root))
+        state = InsightsState(self.state_path)
+        warm = state.refresh(docs, global_tags, threshold, top, method, top_k, min_shared)
+        state.save()
+        self.assertEqual(warm.redundancies, collect_tag_cooccurrence(docs, threshold, top, method))
+        self.assertEqual(warm.cross_counts, cross_reference_counts(docs, top_k, min_shared))
+        self.assertEqual(warm.recommendations, dict(iter_tag_recommendations(docs, global_tags)))
+
+    def test_mutation_sequence(self):
+        self.assert_refresh_matches_cold()
+        # Unchanged corpus: served straight from the state
+        self.assert_refresh_matches_cold()
+
+        with self.subTest("edit words"):
+            self.write("designs/page-0.md", tags=["caching"])
+            self.assert_refresh_matches_cold()
+        with self.subTest("reorder words"):
+            rel = "principles/page-1.md"
+            self.write(rel, words=["data", "pipelines", "kernel", "scheduler", "queue", "cache"] * 3, tags=["storage"])
+            self.assert_refresh_matches_cold()
+            self.write(rel, words=list(reversed(self.body_words(rel))), tags=["storage"])
+            self.assert_refresh_matches_cold()
+        with self.subTest("retag"):
+            self.write("deep-dives/page-2.md", words=self.body_words("deep-dives/page-2.md"), tags=["monitoring", "queues"])
+            self.assert_refresh_matches_cold()
+        with self.subTest("new tag"):
+            self.write("designs/page-3.md", words=self.body_words("designs/page-3.md"), tags=["brand-new"])
+            self.assert_refresh_matches_cold()
+        with self.subTest("add"):
+            self.write("principles/page-new.md")
+            self.assert_refresh_matches_cold()
+        with self.subTest("remove"):
+            (self.root / "deep-dives/page-5.md").unlink()
+            self.assert_refresh_matches_cold()
+        with self.subTest("new tag already a candidate elsewhere"):
+            # A new tag turns other pages' candidate word into an established match without moving any DF
+            for i in (13, 14, 15):
+                rel = f"{SECTIONS[i % 3]}/page-{i}.md"
+                self.write(rel, words=["gammaword"] * 4 + self.body_words(rel), tags=["storage"])
+            self.assert_refresh_matches_cold()
+            self.write("designs/page-3.md", words=self.body_words("designs/page-3.md"), tags=["gammaword"])
+            self.assert_refresh_matches_cold()
+        with self.subTest("edit and retag several"):
+            for i in (6, 7, 9):
+                self.write(f"{SECTIONS[i % 3]}/page-{i}.md")
+            self.assert_refresh_matches_cold()
+
+        for options in ((3, 1, 0.5, 0, "index"), (3, 1, 0.5, 0, "index"), (0, 2, 0.3, 2, "bitset"), (0, 1, 0.5, 0, "index")):
+            with self.subTest("options", options=options):
+                self.assert_refresh_matches_cold(options)
+                self.write("designs/page-12.md")
+                self.assert_refresh_matches_cold(options)
+
+    def test_corpus_size_alone_reorders_recommendations(self):
+        # With N documents, "alphaword" (tf 2, df 11) outscores "betaword" (tf 1, df 5) only when
+        # 2 * log(N / 12) > log(N / 6), i.e. N > 24; adding unrelated pages moves no DF entry it uses
+        for p in self.root.rglob("*.md"):
+            p.unlink()
+        self.write("designs/target.md", words=["alphaword", "alphaword", "betaword"], tags=["misc"])
+        for i in range(10):
+            self.write(f"principles/alpha-{i}.md", words=["alphaword"] + (["betaword"] if i < 4 else []), tags=["misc"])
+        for i in range(12):
+            self.write(f"deep-dives/filler-{i}.md", words=[f"filler{'abcdefghijkl'[i]}"], tags=["misc"])
+        self.assert_refresh_matches_cold()
+        before = InsightsState(self.state_path).data["recommendations"]["designs/target.md"]["new_candidates"]
+        self.assertEqual(before, ["betaword", "alphaword"])
+        for i in range(2):
+            self.write(f"deep-dives/unrelated-{i}.md", words=[f"unrelated{'ab'[i]}"], tags=["misc"])
+        self.assert_refresh_matches_cold()
+
+    def test_random_mutations(self):
+        self.assert_refresh_matches_cold()
+        for step in range(25):
+            with self.subTest(step=step):
+                pages = sorted(p.relative_to(self.root).as_posix() for p in self.root.rglob("*.md"))
+                action = self.rng.choice(("edit", "reorder", "retag", "add", "remove"))
+                rel = self.rng.choice(pages)
+                if action == "edit":
+                    self.write(rel)
+                elif action == "reorder":
+                    words = self.body_words(rel)
+                    self.rng.shuffle(words)
+                    tags = (self.root / rel).read_text(encoding="utf-8").split("tags: [", 1)[1].split("]", 1)[0].split(", ")
+                    self.write(rel, words=words, tags=tags)
+                elif action == "retag":
+                    self.write(rel, words=self.body_words(rel))
+                elif action == "add":
+                    self.write(f"{self.rng.choice(SECTIONS)}/page-{100 + step}.md")
+                elif len(pages) > 3:
+                    (self.root / rel).unlink()
+                self.assert_refresh_matches_cold()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import io
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from scripts.corpus import load_corpus
+from scripts.jsonstream import JsonArray, JsonObject, write_json, write_ndjson
+from scripts.metadata import run_tag_stats
+
+
+class WriteJsonTest(unittest.TestCase):
+    def test_matches_json_dumps(self):
+        value = {"a": [1, 2, {"b": None}], "c": {"d": "e"}, "f": []}
+        streamed = JsonObject([("a", JsonArray(iter([1, 2, {"b": None}]))), ("c", {"d": "e"}), ("f", JsonArray([]))])
+        out = io.StringIO()
+        write_json(streamed, out)
+        self.assertEqual(out.getvalue(), json.dumps(value, indent=2) + "\n")
+
+    def test_default_follows_redirected_stdout(self):
+        buf = io.StringIO()
+        with redirect_stdout(buf):
+            write_json(JsonArray(range(3)))
+        self.assertEqual(buf.getvalue(), json.dumps([0, 1, 2], indent=2) + "\n")
+
+
+class WriteNdjsonTest(unittest.TestCase):
+    def test_default_follows_redirected_stdout(self):
+        buf = io.StringIO()
+        with redirect_stdout(buf):
+            write_ndjson({"n": i} for i in range(2))
+        self.assertEqual(buf.getvalue(), '{"n":0}\n{"n":1}\n')
+
+    def test_tag_stats_output_can_be_captured(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "a.md").write_text('---\ntitle: "A"\ntags: [x, y]\n---\nbody\n', encoding="utf-8")
+            (root / "b.md").write_text('---\ntitle: "B"\ntags: [x]\n---\nbody\n', encoding="utf-8")
+            buf = io.StringIO()
+            with redirect_stdout(buf):
+                run_tag_stats(load_corpus(root, header_only=True), 1, 0, False, False, ndjson=True)
+        self.assertEqual(buf.getvalue(), '{"tag":"x","count":2}\n{"tag":"y","count":1}\n')
+
+
+if __name__ == "__main__":
+    unittest.main()